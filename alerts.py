@@ -0,0 +1,353 @@
+import argparse
+import json
+import logging
+import sqlite3
+import time
+import urllib.request
+
+from incremental import IncrementalEMA, SlidingMeanStd
+from providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+
+# Estado dos indicadores de um ativo, atualizado barra a barra em O(1)
+# Reproduz os parâmetros padrão de calculate_indicators (ta)
+class IndicatorState:
+    def __init__(self, rsi_window=14, macd_fast=12, macd_slow=26, macd_sign=9,
+                 bb_window=20, bb_dev=2):
+        self.prev_close = None
+        self.rsi_up = IncrementalEMA(1 / rsi_window, rsi_window)
+        self.rsi_down = IncrementalEMA(1 / rsi_window, rsi_window)
+        self.ema_fast = IncrementalEMA(2 / (macd_fast + 1), macd_fast)
+        self.ema_slow = IncrementalEMA(2 / (macd_slow + 1), macd_slow)
+        self.macd_signal = IncrementalEMA(2 / (macd_sign + 1), macd_sign)
+        self.bollinger = SlidingMeanStd(bb_window)
+        self.bb_dev = bb_dev
+        self.timestamp = None
+        self.snapshot = {}
+
+    def update(self, timestamp, close):
+        # Como no ta, a primeira barra (sem variação) conta como 0
+        diff = close - self.prev_close if self.prev_close is not None else 0.0
+        self.rsi_up.update(diff if diff > 0 else 0.0)
+        self.rsi_down.update(-diff if diff < 0 else 0.0)
+        self.prev_close = close
+
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        macd = fast - slow if fast is not None and slow is not None else None
+        macd_signal = self.macd_signal.update(macd)
+
+        self.bollinger.update(close)
+
+        rsi = None
+        up, down = self.rsi_up.value, self.rsi_down.value
+        if up is not None and down is not None:
+            rsi = 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+
+        bb_upper = bb_lower = None
+        if self.bollinger.ready:
+            mean, std = self.bollinger.mean, self.bollinger.std
+            bb_upper = mean + self.bb_dev * std
+            bb_lower = mean - self.bb_dev * std
+
+        self.timestamp = timestamp
+        self.snapshot = {
+            'close': close,
+            'RSI': rsi,
+            'MACD': macd,
+            'MACD_signal': macd_signal,
+            'BB_upper': bb_upper,
+            'BB_lower': bb_lower,
+        }
+        return self.snapshot
+
+
+def _defined(*values):
+    return all(v is not None for v in values)
+
+
+def _rsi_above(cur, prev, value):
+    return _defined(cur['RSI']) and cur['RSI'] > value
+
+
+def _rsi_below(cur, prev, value):
+    return _defined(cur['RSI']) and cur['RSI'] < value
+
+
+def _macd_cross_up(cur, prev, value):
+    return (_defined(cur['MACD'], cur['MACD_signal'], prev.get('MACD'), prev.get('MACD_signal'))
+            and prev['MACD'] <= prev['MACD_signal'] and cur['MACD'] > cur['MACD_signal'])
+
+
+def _macd_cross_down(cur, prev, value):
+    return (_defined(cur['MACD'], cur['MACD_signal'], prev.get('MACD'), prev.get('MACD_signal'))
+            and prev['MACD'] >= prev['MACD_signal'] and cur['MACD'] < cur['MACD_signal'])
+
+
+def _bb_break_upper(cur, prev, value):
+    return _defined(cur['BB_upper']) and cur['close'] > cur['BB_upper']
+
+
+def _bb_break_lower(cur, prev, value):
+    return _defined(cur['BB_lower']) and cur['close'] < cur['BB_lower']
+
+
+# Condições disponíveis: nome -> (função, valor padrão, mensagem)
+CONDITIONS = {
+    'rsi_above': (_rsi_above, 70, "⚠️ RSI acima de {value:g} - condições de sobrecompra"),
+    'rsi_below': (_rsi_below, 30, "💡 RSI abaixo de {value:g} - condições de sobrevenda"),
+    'macd_cross_up': (_macd_cross_up, None, "🟢 MACD cruzou acima da linha de sinal"),
+    'macd_cross_down': (_macd_cross_down, None, "🔴 MACD cruzou abaixo da linha de sinal"),
+    'bb_break_upper': (_bb_break_upper, None, "⚠️ Preço rompeu a Banda de Bollinger superior"),
+    'bb_break_lower': (_bb_break_lower, None, "💡 Preço rompeu a Banda de Bollinger inferior"),
+}
+
+
+# Carregar regras de um arquivo JSON (lista de objetos)
+def load_rules(path):
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    for i, rule in enumerate(rules):
+        if rule.get('condition') not in CONDITIONS:
+            raise ValueError(f"Regra {i}: condição desconhecida {rule.get('condition')!r}")
+        if 'symbol' not in rule:
+            raise ValueError(f"Regra {i}: campo 'symbol' obrigatório")
+        rule.setdefault('id', f"{rule['symbol']}:{rule['condition']}:{i}")
+        rule.setdefault('value', CONDITIONS[rule['condition']][1])
+        rule.setdefault('cooldown', 0)
+    # Regras com o mesmo id compartilhariam o estado de disparo
+    seen = set()
+    for i, rule in enumerate(rules):
+        if rule['id'] in seen:
+            raise ValueError(f"Regra {i}: id duplicado {rule['id']!r}")
+        seen.add(rule['id'])
+    return rules
+
+
+# Destino que grava alertas em um arquivo JSON Lines
+class JsonlSink:
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+# Destino que grava alertas em uma tabela SQLite
+class SQLiteSink:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alerts ("
+            "rule_id TEXT, symbol TEXT, condition TEXT, timestamp TEXT, "
+            "close REAL, message TEXT, PRIMARY KEY (rule_id, timestamp))"
+        )
+        self.conn.commit()
+
+    def emit(self, alert):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO alerts VALUES (?, ?, ?, ?, ?, ?)",
+            (alert['rule_id'], alert['symbol'], alert['condition'],
+             alert['timestamp'], alert['close'], alert['message'])
+        )
+        self.conn.commit()
+
+
+# Destino que envia alertas via POST JSON para um webhook
+class WebhookSink:
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, alert):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(alert).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            urllib.request.urlopen(request, timeout=self.timeout).close()
+        except Exception as e:
+            logger.error("Erro ao enviar alerta para o webhook: %s", e)
+
+
+# Criar um destino a partir de "jsonl:caminho", "sqlite:caminho" ou "webhook:url"
+def create_sink(spec):
+    kind, _, target = spec.partition(':')
+    sinks = {'jsonl': JsonlSink, 'sqlite': SQLiteSink, 'webhook': WebhookSink}
+    if kind not in sinks or not target:
+        raise ValueError(f"Destino inválido: {spec!r}")
+    return sinks[kind](target)
+
+
+# Motor de alertas: avalia as regras de cada ativo a cada nova barra
+class AlertEngine:
+    def __init__(self, rules, sinks):
+        self.sinks = sinks
+        self.states = {}
+        self.rules_by_symbol = {}
+        for rule in rules:
+            self.rules_by_symbol.setdefault(rule['symbol'], []).append(rule)
+        # Resultado da condição na barra anterior (disparo só na transição)
+        self.active = {}
+        # Timestamp do último disparo de cada regra (limite de frequência)
+        self.last_fired = {}
+
+    @property
+    def symbols(self):
+        return list(self.rules_by_symbol)
+
+    # Descartar o estado dos indicadores de um ativo (para reaquecer)
+    def reset(self, symbol):
+        self.states.pop(symbol, None)
+        for rule in self.rules_by_symbol.get(symbol, ()):
+            self.active.pop(rule['id'], None)
+
+    def on_bar(self, symbol, timestamp, close, emit=True):
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState()
+        elif state.timestamp is not None and timestamp <= state.timestamp:
+            # Barra repetida ou fora de ordem
+            return []
+
+        prev = state.snapshot
+        cur = state.update(timestamp, close)
+
+        alerts = []
+        # Condições repetidas entre regras do mesmo ativo são avaliadas uma vez
+        results = {}
+        for rule in self.rules_by_symbol.get(symbol, ()):
+            key = (rule['condition'], rule['value'])
+            if key not in results:
+                results[key] = CONDITIONS[rule['condition']][0](cur, prev, rule['value'])
+            triggered = results[key]
+
+            was_active = self.active.get(rule['id'], False)
+            self.active[rule['id']] = triggered
+            if not triggered or was_active or not emit:
+                continue
+
+            last = self.last_fired.get(rule['id'])
+            if last is not None and _seconds_between(last, timestamp) < rule['cooldown']:
+                continue
+            self.last_fired[rule['id']] = timestamp
+
+            alerts.append(self._build_alert(rule, symbol, timestamp, close))
+
+        # Uma falha em um destino (disco cheio, banco travado) não derruba o
+        # serviço nem impede a entrega aos demais destinos
+        for alert in alerts:
+            for sink in self.sinks:
+                try:
+                    sink.emit(alert)
+                except Exception as e:
+                    logger.error("Erro ao gravar alerta em %s: %s", type(sink).__name__, e)
+        return alerts
+
+    def _build_alert(self, rule, symbol, timestamp, close):
+        message = CONDITIONS[rule['condition']][2].format(value=rule['value'] or 0)
+        return {
+            'rule_id': rule['id'],
+            'symbol': symbol,
+            'condition': rule['condition'],
+            'timestamp': _format_timestamp(timestamp),
+            'close': close,
+            'message': f"{symbol}: {message}",
+        }
+
+
+def _seconds_between(start, end):
+    delta = end - start
+    return delta.total_seconds() if hasattr(delta, 'total_seconds') else delta
+
+
+def _format_timestamp(timestamp):
+    return timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
+
+
+# Alimentar o motor com as barras fechadas ainda não processadas
+def feed_new_bars(engine, history, emit=True):
+    alerts = []
+    for symbol, df in history.items():
+        # A última barra ainda está em formação
+        for timestamp, close in df['Close'].iloc[:-1].items():
+            alerts.extend(engine.on_bar(symbol, timestamp, float(close), emit=emit))
+    return alerts
+
+
+# Ativos cujas barras consultadas começam depois de uma lacuna em relação à
+# última barra processada (consulta falhou ou ficou atrasada além do lookback);
+# o estado incremental desses ativos divergiria de calculate_indicators
+def find_gaps(engine, history):
+    gaps = []
+    for symbol, df in history.items():
+        state = engine.states.get(symbol)
+        if state is None or state.timestamp is None or len(df) < 2:
+            continue
+        step = df.index.to_series().diff().median()
+        if df.index[0] > state.timestamp + step * 1.5:
+            gaps.append(symbol)
+    return gaps
+
+
+# Reaquecer os ativos com lacuna usando o histórico anterior às barras consultadas
+def rewarm(engine, provider, symbols, history, period, interval):
+    warmup = provider.history_many(symbols, period, interval)
+    for symbol in symbols:
+        engine.reset(symbol)
+        df = warmup[symbol]
+        # Inclui a barra anterior à consulta, que feed_new_bars descartaria
+        # como barra em formação
+        before = df.loc[df.index < history[symbol].index[0]]
+        for timestamp, close in before['Close'].items():
+            engine.on_bar(symbol, timestamp, float(close), emit=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço de alertas de indicadores técnicos")
+    parser.add_argument('--rules', required=True, help="Arquivo JSON com as regras")
+    parser.add_argument('--sink', action='append', default=[],
+                        help="Destino dos alertas: jsonl:arquivo, sqlite:arquivo ou webhook:url")
+    parser.add_argument('--interval', default='1h', help="Intervalo das barras")
+    parser.add_argument('--warmup-period', default='3mo', help="Histórico usado para aquecer os indicadores")
+    parser.add_argument('--poll', type=float, default=60, help="Segundos entre consultas")
+    parser.add_argument('--lookback', default='5d', help="Período consultado a cada ciclo")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    rules = load_rules(args.rules)
+    sinks = [create_sink(spec) for spec in args.sink or ['jsonl:alerts.jsonl']]
+    engine = AlertEngine(rules, sinks)
+    provider = get_provider()
+    logger.info("%d regras carregadas para %d ativos (fonte: %s)", len(rules), len(engine.symbols), provider.name)
+
+    # Aquecer os indicadores sem emitir alertas
+    feed_new_bars(engine, provider.history_many(engine.symbols, args.warmup_period, args.interval), emit=False)
+
+    while True:
+        time.sleep(args.poll)
+        try:
+            history = provider.history_many(engine.symbols, args.lookback, args.interval)
+        except Exception as e:
+            logger.error("Erro ao buscar dados: %s", e)
+            continue
+        gaps = find_gaps(engine, history)
+        if gaps:
+            logger.warning("Lacuna de barras em %s; reaquecendo os indicadores", ", ".join(gaps))
+            try:
+                rewarm(engine, provider, gaps, history, args.warmup_period, args.interval)
+            except Exception as e:
+                logger.error("Erro ao reaquecer os indicadores: %s", e)
+                continue
+        start = time.perf_counter()
+        alerts = feed_new_bars(engine, history)
+        logger.info("%d alertas emitidos em %.1f ms", len(alerts), (time.perf_counter() - start) * 1000)
+
+
+if __name__ == "__main__":
+    main()
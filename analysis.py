@@ -0,0 +1,206 @@
+import pandas as pd
+from lazy_imports import lazy_import
+from levels import nearest_levels
+
+ta = lazy_import("ta")
+
+# Função para calcular indicadores técnicos
+def calculate_indicators(df, ma_short=20, ma_long=50):
+    if df is None or df.empty:
+        return df
+    
+    # Médias Móveis Simples
+    df['SMA_short'] = ta.trend.sma_indicator(df['Close'], window=ma_short)
+    df['SMA_long'] = ta.trend.sma_indicator(df['Close'], window=ma_long)
+    
+    # Médias Móveis Exponenciais
+    df['EMA_short'] = ta.trend.ema_indicator(df['Close'], window=ma_short)
+    df['EMA_long'] = ta.trend.ema_indicator(df['Close'], window=ma_long)
+    
+    # Bandas de Bollinger
+    bollinger = ta.volatility.BollingerBands(df['Close'])
+    df['BB_upper'] = bollinger.bollinger_hband()
+    df['BB_middle'] = bollinger.bollinger_mavg()
+    df['BB_lower'] = bollinger.bollinger_lband()
+    
+    # RSI
+    df['RSI'] = ta.momentum.rsi(df['Close'], window=14)
+    
+    # MACD
+    macd = ta.trend.MACD(df['Close'])
+    df['MACD'] = macd.macd()
+    df['MACD_signal'] = macd.macd_signal()
+    df['MACD_diff'] = macd.macd_diff()
+    
+    # Indicadores de volume
+    df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
+    
+    return df
+
+# Função para gerar análise de mercado
+def generate_market_analysis(df, ma_short, ma_long, zones=None):
+    if df is None or df.empty:
+        return None
+    
+    analysis = {
+        'trend': '',
+        'momentum': '',
+        'volatility': '',
+        'volume': '',
+        'prediction': '',
+        'key_levels': {},
+        'signals': [],
+        'score': 0
+    }
+    
+    # Obter valores mais recentes
+    current_price = df['Close'].iloc[-1]
+    rsi = df['RSI'].iloc[-1] if not pd.isna(df['RSI'].iloc[-1]) else 50
+    macd = df['MACD'].iloc[-1] if not pd.isna(df['MACD'].iloc[-1]) else 0
+    macd_signal = df['MACD_signal'].iloc[-1] if not pd.isna(df['MACD_signal'].iloc[-1]) else 0
+    sma_short = df['SMA_short'].iloc[-1] if not pd.isna(df['SMA_short'].iloc[-1]) else current_price
+    sma_long = df['SMA_long'].iloc[-1] if not pd.isna(df['SMA_long'].iloc[-1]) else current_price
+    bb_upper = df['BB_upper'].iloc[-1] if not pd.isna(df['BB_upper'].iloc[-1]) else current_price * 1.02
+    bb_lower = df['BB_lower'].iloc[-1] if not pd.isna(df['BB_lower'].iloc[-1]) else current_price * 0.98
+    
+    # Calcular mudanças de preço
+    price_change_7d = ((current_price - df['Close'].iloc[-7]) / df['Close'].iloc[-7] * 100) if len(df) >= 7 else 0
+    price_change_30d = ((current_price - df['Close'].iloc[-30]) / df['Close'].iloc[-30] * 100) if len(df) >= 30 else 0
+    
+    # Análise de Tendência
+    if sma_short > sma_long:
+        if price_change_7d > 5:
+            analysis['trend'] = "Fortemente Altista"
+            analysis['signals'].append("🚀 Forte tendência de alta confirmada")
+        else:
+            analysis['trend'] = "Altista"
+            analysis['signals'].append("📈 Tendência de alta em progresso")
+    else:
+        if price_change_7d < -5:
+            analysis['trend'] = "Fortemente Baixista"
+            analysis['signals'].append("⚠️ Forte tendência de baixa detectada")
+        else:
+            analysis['trend'] = "Baixista"
+            analysis['signals'].append("📉 Tendência de baixa em progresso")
+    
+    # Análise de Momentum
+    if rsi > 70:
+        analysis['momentum'] = "Sobrecomprado"
+        analysis['signals'].append("⚠️ RSI indica condições de sobrecompra - possível correção à frente")
+    elif rsi < 30:
+        analysis['momentum'] = "Sobrevendido"
+        analysis['signals'].append("💡 RSI indica condições de sobrevenda - possível recuperação esperada")
+    elif 45 <= rsi <= 55:
+        analysis['momentum'] = "Neutro"
+        analysis['signals'].append("⚖️ Momentum está neutro - aguardando direção")
+    elif rsi > 55:
+        analysis['momentum'] = "Altista"
+        analysis['signals'].append("✅ Momentum positivo em construção")
+    else:
+        analysis['momentum'] = "Baixista"
+        analysis['signals'].append("⚠️ Momentum negativo presente")
+    
+    # Análise MACD
+    if macd > macd_signal:
+        if macd > 0:
+            analysis['signals'].append("🟢 MACD cruzamento altista - sinal de compra ativo")
+        else:
+            analysis['signals'].append("🟡 MACD virando altista - sinal de compra inicial")
+    else:
+        if macd < 0:
+            analysis['signals'].append("🔴 MACD cruzamento baixista - sinal de venda ativo")
+        else:
+            analysis['signals'].append("🟠 MACD virando baixista - cautela aconselhada")
+    
+    # Análise de Volatilidade
+    bb_width = ((bb_upper - bb_lower) / current_price) * 100
+    if bb_width > 10:
+        analysis['volatility'] = "Alta"
+        analysis['signals'].append("🌊 Alta volatilidade detectada - espere grandes oscilações de preço")
+    elif bb_width < 5:
+        analysis['volatility'] = "Baixa"
+        analysis['signals'].append("😴 Baixa volatilidade - possível rompimento chegando")
+    else:
+        analysis['volatility'] = "Moderada"
+    
+    # Volatilidade realizada e drawdown (colunas de calculate_risk_indicators)
+    if 'RV' in df and not pd.isna(df['RV'].iloc[-1]):
+        analysis['realized_volatility'] = df['RV'].iloc[-1]
+        rv_zscore = df['RV_zscore'].iloc[-1]
+        if not pd.isna(rv_zscore) and rv_zscore > 2:
+            analysis['signals'].append(f"🌊 Volatilidade realizada {rv_zscore:.1f} desvios acima da média recente - risco elevado")
+        elif not pd.isna(rv_zscore) and rv_zscore < -1.5:
+            analysis['signals'].append("😴 Volatilidade realizada comprimida abaixo da média recente - possível expansão à frente")
+    if 'Drawdown' in df and not pd.isna(df['Drawdown'].iloc[-1]) and df['Drawdown'].iloc[-1] < -0.2:
+        analysis['signals'].append(f"📉 Preço {abs(df['Drawdown'].iloc[-1]) * 100:.1f}% abaixo da máxima da janela - drawdown profundo")
+    
+    # Posição nas Bandas de Bollinger
+    if current_price > bb_upper:
+        analysis['signals'].append("⚠️ Preço acima da Banda de Bollinger superior - sobreestendido")
+    elif current_price < bb_lower:
+        analysis['signals'].append("💡 Preço abaixo da Banda de Bollinger inferior - possível reversão")
+    
+    # Análise de Volume
+    avg_volume = df['Volume'].tail(20).mean()
+    current_volume = df['Volume'].iloc[-1]
+    volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
+    
+    if volume_ratio > 1.5:
+        analysis['volume'] = "Alto"
+        analysis['signals'].append("📊 Aumento de volume detectado - forte convicção no movimento atual")
+    elif volume_ratio < 0.5:
+        analysis['volume'] = "Baixo"
+        analysis['signals'].append("📉 Volume baixo - falta de convicção, tendência pode ser fraca")
+    else:
+        analysis['volume'] = "Normal"
+    
+    # Níveis Chave: zonas de pivôs quando disponíveis, senão extremos de 30 barras
+    recent_high = df['High'].tail(30).max()
+    recent_low = df['Low'].tail(30).min()
+    support_zone, resistance_zone = nearest_levels(zones or [], current_price)
+    if resistance_zone:
+        recent_high = resistance_zone['price']
+    if support_zone:
+        recent_low = support_zone['price']
+    analysis['key_levels'] = {
+        'resistance': recent_high,
+        'support': recent_low,
+        'resistance_touches': resistance_zone['touches'] if resistance_zone else None,
+        'support_touches': support_zone['touches'] if support_zone else None,
+        'bb_upper': bb_upper,
+        'bb_lower': bb_lower
+    }
+    
+    # Preço dentro de uma zona de suporte/resistência
+    for zone in zones or []:
+        if zone['low'] <= current_price <= zone['high']:
+            analysis['signals'].append(f"🧱 Preço testando zona de ${zone['low']:,.2f} - ${zone['high']:,.2f} ({zone['touches']} toques)")
+            break
+    
+    # Gerar Previsão
+    bullish_signals = sum([
+        sma_short > sma_long,
+        rsi < 70 and rsi > 45,
+        macd > macd_signal,
+        price_change_7d > 0,
+        current_price > bb_lower
+    ])
+    analysis['score'] = bullish_signals
+    
+    if bullish_signals >= 4:
+        analysis['prediction'] = "Forte Compra"
+        analysis['outlook'] = f"Com base nos indicadores técnicos, o Bitcoin mostra forte momentum altista. O preço está atualmente em ${current_price:,.2f} com múltiplos indicadores sugerindo movimento ascendente. A resistência chave está em ${recent_high:,.2f}. Se este nível for rompido, podemos ver ganhos adicionais em direção a ${recent_high * 1.05:,.2f}."
+    elif bullish_signals >= 3:
+        analysis['prediction'] = "Compra"
+        analysis['outlook'] = f"O Bitcoin está mostrando sinais positivos com o preço atual em ${current_price:,.2f}. A tendência é favorável, embora alguma cautela seja justificada. Observe o rompimento acima de ${recent_high:,.2f} para confirmação da continuação da tendência de alta."
+    elif bullish_signals == 2:
+        analysis['prediction'] = "Manter"
+        analysis['outlook'] = f"O Bitcoin está em fase de consolidação em ${current_price:,.2f}. Sinais mistos sugerem aguardar por direção mais clara. Níveis chave a observar: suporte em ${recent_low:,.2f} e resistência em ${recent_high:,.2f}."
+    elif bullish_signals == 1:
+        analysis['prediction'] = "Venda"
+        analysis['outlook'] = f"Indicadores técnicos sugerem fraqueza na ação de preço do Bitcoin em ${current_price:,.2f}. Considere reduzir exposição. O suporte crítico em ${recent_low:,.2f} deve se manter para prevenir declínio adicional."
+    else:
+        analysis['prediction'] = "Forte Venda"
+        analysis['outlook'] = f"Múltiplos sinais baixistas detectados com Bitcoin em ${current_price:,.2f}. O risco de queda está elevado. Se o suporte em ${recent_low:,.2f} for rompido, espere declínio adicional em direção a ${recent_low * 0.95:,.2f}."
+    
+    return analysis
@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import yfinance as yf
+import os
 from datetime import datetime, timedelta
-import ta
+from lazy_imports import lazy_import, IMPORT_TIMES
+from analysis import calculate_indicators, generate_market_analysis
+from confluence import BASE_SERIES, load_base_series, compute_confluence, summarize_confluence
+from levels import detect_levels, zones_near_price
+from risk import calculate_risk_indicators, periods_per_year
+from providers import get_provider
+
+# Dependências pesadas carregadas sob demanda, no primeiro uso
+go = lazy_import("plotly.graph_objects")
+plotly_subplots = lazy_import("plotly.subplots")
 
 # Configuração da página
 st.set_page_config(
@@ -15,189 +22,42 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS personalizado com cores melhoradas
-st.markdown("""
-    <style>
-    .main {
-        padding: 0rem 1rem;
-        background-color: #0e1117;
-    }
-    
-    .stMetric {
-        background: linear-gradient(135deg, #1e2530 0%, #2d3748 100%);
-        padding: 20px;
-        border-radius: 10px;
-        border: 1px solid #3d4758;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
-    }
-    
-    .stMetric label {
-        color: #a0aec0 !important;
-        font-size: 14px !important;
-        font-weight: 600 !important;
-    }
-    
-    .stMetric [data-testid="stMetricValue"] {
-        color: #ffffff !important;
-        font-size: 24px !important;
-        font-weight: 700 !important;
-    }
-    
-    .stMetric [data-testid="stMetricDelta"] {
-        font-size: 16px !important;
-        font-weight: 600 !important;
-    }
-    
-    h1 {
-        color: #f7931a !important;
-        font-weight: 800 !important;
-        text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.5);
-    }
-    
-    h2, h3 {
-        color: #ffffff !important;
-        font-weight: 700 !important;
-    }
-    
-    .stSelectbox label, .stCheckbox label, .stSlider label {
-        color: #e2e8f0 !important;
-        font-weight: 600 !important;
-    }
-    
-    div[data-baseweb="select"] > div {
-        background-color: #2d3748 !important;
-        border-color: #4a5568 !important;
-        color: #ffffff !important;
-    }
-    
-    .stButton > button {
-        background: linear-gradient(135deg, #f7931a 0%, #ff9f1a 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 10px 24px;
-        font-weight: 600;
-        box-shadow: 0 4px 6px rgba(247, 147, 26, 0.3);
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #ff9f1a 0%, #f7931a 100%);
-        box-shadow: 0 6px 8px rgba(247, 147, 26, 0.4);
-        transform: translateY(-2px);
-    }
-    
-    .success-box {
-        background-color: #1a472a;
-        border-left: 4px solid #22c55e;
-        padding: 15px;
-        border-radius: 5px;
-        color: #86efac;
-        margin: 10px 0;
-    }
-    
-    .error-box {
-        background-color: #4a1a1a;
-        border-left: 4px solid #ef4444;
-        padding: 15px;
-        border-radius: 5px;
-        color: #fca5a5;
-        margin: 10px 0;
-    }
-    
-    .warning-box {
-        background-color: #4a3a1a;
-        border-left: 4px solid #f59e0b;
-        padding: 15px;
-        border-radius: 5px;
-        color: #fcd34d;
-        margin: 10px 0;
-    }
-    
-    .info-box {
-        background-color: #1a3a4a;
-        border-left: 4px solid #3b82f6;
-        padding: 15px;
-        border-radius: 5px;
-        color: #93c5fd;
-        margin: 10px 0;
-    }
-    
-    .analysis-box {
-        background: linear-gradient(135deg, #1e3a5f 0%, #2d4a6f 100%);
-        border: 2px solid #3b82f6;
-        border-radius: 15px;
-        padding: 25px;
-        margin: 20px 0;
-        box-shadow: 0 8px 16px rgba(59, 130, 246, 0.2);
-    }
-    
-    .analysis-header {
-        color: #60a5fa;
-        font-size: 24px;
-        font-weight: 700;
-        margin-bottom: 15px;
-        display: flex;
-        align-items: center;
-    }
-    
-    .analysis-content {
-        color: #e2e8f0;
-        font-size: 16px;
-        line-height: 1.8;
-    }
-    
-    .prediction-card {
-        background: linear-gradient(135deg, #2d1b4e 0%, #3d2b5e 100%);
-        border: 2px solid #8b5cf6;
-        border-radius: 12px;
-        padding: 20px;
-        margin: 15px 0;
-        box-shadow: 0 6px 12px rgba(139, 92, 246, 0.2);
-    }
-    
-    .prediction-title {
-        color: #a78bfa;
-        font-size: 18px;
-        font-weight: 600;
-        margin-bottom: 10px;
-    }
-    
-    .prediction-text {
-        color: #e2e8f0;
-        font-size: 15px;
-        line-height: 1.6;
-    }
-    
-    hr {
-        border-color: #4a5568 !important;
-        margin: 30px 0;
-    }
-    
-    .sidebar .sidebar-content {
-        background-color: #1a202c;
-    }
-    
-    [data-testid="stSidebar"] {
-        background-color: #1a202c;
-    }
-    
-    .stDataFrame {
-        background-color: #2d3748;
-        border-radius: 10px;
-    }
-    
-    </style>
-    """, unsafe_allow_html=True)
+# CSS personalizado servido como arquivo estático (static/style.css);
+# a cada rerun só o link é reenviado e o navegador usa a folha em cache
+STYLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "style.css")
+
+@st.cache_resource
+def load_style():
+    with open(STYLE_PATH, encoding="utf-8") as f:
+        return f.read()
+
+# O Streamlit lê .streamlit/config.toml do diretório atual; rodando de outro
+# diretório o servidor estático fica desligado e a folha vai embutida
+if st.get_option("server.enableStaticServing"):
+    st.markdown(
+        '<link rel="stylesheet" href="app/static/style.css">',
+        unsafe_allow_html=True
+    )
+else:
+    st.markdown(f"<style>{load_style()}</style>", unsafe_allow_html=True)
 
-# Título com efeito gradiente
+# Título com efeito gradiente; o texto faz parte da página e fica no script,
+# só o estilo vem da folha estática
 st.markdown("""
-    <h1 style='text-align: center; font-size: 48px; margin-bottom: 10px;'>
+    <h1 class='dashboard-title'>
         ₿ Painel de Análise Técnica do Bitcoin
     </h1>
     """, unsafe_allow_html=True)
 st.markdown("---")
 
+# Fonte de dados (Yahoo Finance, arquivos locais, replay ou negócios), compartilhada
+# entre sessões; configurada por BTC_DASHBOARD_PROVIDER
+@st.cache_resource
+def get_data_provider():
+    return get_provider()
+
+data_provider = get_data_provider()
+
 # Barra lateral com estilo melhorado
 with st.sidebar:
     st.markdown("### ⚙️ Configurações")
@@ -219,8 +79,8 @@ with st.sidebar:
         index=3
     )
     
-    # Seleção de intervalo
-    interval_options = {
+    # Seleção de intervalo (fontes de negócios oferecem barras personalizadas)
+    interval_options = data_provider.interval_options or {
         "1 Dia": "1d",
         "1 Semana": "1wk",
         "1 Mês": "1mo"
@@ -232,217 +92,75 @@ with st.sidebar:
         index=0
     )
     
-    # Indicadores técnicos
-    st.markdown("---")
-    st.markdown("### 📊 Indicadores Técnicos")
-    show_sma = st.checkbox("Média Móvel Simples (SMA)", value=True)
-    show_ema = st.checkbox("Média Móvel Exponencial (EMA)", value=True)
-    show_bb = st.checkbox("Bandas de Bollinger", value=True)
-    show_rsi = st.checkbox("RSI", value=True)
-    show_macd = st.checkbox("MACD", value=True)
-    show_volume = st.checkbox("Volume", value=True)
-    
     # Períodos das médias móveis
-    if show_sma or show_ema:
-        st.markdown("---")
-        st.markdown("### 📈 Períodos das MAs")
-        ma_short = st.slider("Período Curto", 5, 50, 20)
-        ma_long = st.slider("Período Longo", 50, 200, 50)
+    st.markdown("---")
+    st.markdown("### 📈 Períodos das MAs")
+    ma_short = st.slider("Período Curto", 5, 50, 20)
+    ma_long = st.slider("Período Longo", 50, 200, 50)
 
-# Função para buscar dados do Bitcoin
-@st.cache_data(ttl=300)
-def get_bitcoin_data(period, interval):
+# Função para buscar o histórico do Bitcoin na fonte
+def fetch_bitcoin_history(period, interval):
+    return data_provider.history("BTC-USD", period, interval)
+
+# Função para buscar dados do Bitcoin; data_token muda quando a fonte
+# libera novas barras (replay) e invalida o cache
+@st.cache_data(ttl=300, max_entries=100)
+def get_bitcoin_data(period, interval, data_token=None):
     try:
-        btc = yf.Ticker("BTC-USD")
-        df = btc.history(period=period, interval=interval)
+        df = fetch_bitcoin_history(period, interval)
         return df
     except Exception as e:
         st.error(f"Erro ao buscar dados: {str(e)}")
         return None
 
-# Função para calcular indicadores técnicos
-def calculate_indicators(df, ma_short=20, ma_long=50):
-    if df is None or df.empty:
-        return df
-    
-    # Médias Móveis Simples
-    df['SMA_short'] = ta.trend.sma_indicator(df['Close'], window=ma_short)
-    df['SMA_long'] = ta.trend.sma_indicator(df['Close'], window=ma_long)
-    
-    # Médias Móveis Exponenciais
-    df['EMA_short'] = ta.trend.ema_indicator(df['Close'], window=ma_short)
-    df['EMA_long'] = ta.trend.ema_indicator(df['Close'], window=ma_long)
-    
-    # Bandas de Bollinger
-    bollinger = ta.volatility.BollingerBands(df['Close'])
-    df['BB_upper'] = bollinger.bollinger_hband()
-    df['BB_middle'] = bollinger.bollinger_mavg()
-    df['BB_lower'] = bollinger.bollinger_lband()
-    
-    # RSI
-    df['RSI'] = ta.momentum.rsi(df['Close'], window=14)
-    
-    # MACD
-    macd = ta.trend.MACD(df['Close'])
-    df['MACD'] = macd.macd()
-    df['MACD_signal'] = macd.macd_signal()
-    df['MACD_diff'] = macd.macd_diff()
-    
-    # Indicadores de volume
-    df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
-    
-    return df
+# Função para calcular a matriz de confluência multi-timeframe
+@st.cache_data(ttl=300, max_entries=100)
+def get_confluence_matrix(ma_short, ma_long, data_token=None):
+    try:
+        base_series = load_base_series(fetch_bitcoin_history)
+        return compute_confluence(base_series, ma_short, ma_long)
+    except Exception as e:
+        st.error(f"Erro ao calcular confluência: {str(e)}")
+        return None
 
-# Função para gerar análise de mercado
-def generate_market_analysis(df, ma_short, ma_long):
+# Cada etapa é cacheada só com os parâmetros de que depende: mudar as médias
+# não recalcula as zonas, e a janela de volatilidade só afeta a seção de risco
+
+# Função para calcular indicadores; as estatísticas de risco usadas nos sinais
+# da análise ficam na janela padrão de 30 barras
+@st.cache_data(ttl=300, max_entries=100)
+def get_indicator_data(period, interval, ma_short, ma_long, data_token=None):
+    df = get_bitcoin_data(period, interval, data_token)
     if df is None or df.empty:
         return None
-    
-    analysis = {
-        'trend': '',
-        'momentum': '',
-        'volatility': '',
-        'volume': '',
-        'prediction': '',
-        'key_levels': {},
-        'signals': []
-    }
-    
-    # Obter valores mais recentes
-    current_price = df['Close'].iloc[-1]
-    rsi = df['RSI'].iloc[-1] if not pd.isna(df['RSI'].iloc[-1]) else 50
-    macd = df['MACD'].iloc[-1] if not pd.isna(df['MACD'].iloc[-1]) else 0
-    macd_signal = df['MACD_signal'].iloc[-1] if not pd.isna(df['MACD_signal'].iloc[-1]) else 0
-    sma_short = df['SMA_short'].iloc[-1] if not pd.isna(df['SMA_short'].iloc[-1]) else current_price
-    sma_long = df['SMA_long'].iloc[-1] if not pd.isna(df['SMA_long'].iloc[-1]) else current_price
-    bb_upper = df['BB_upper'].iloc[-1] if not pd.isna(df['BB_upper'].iloc[-1]) else current_price * 1.02
-    bb_lower = df['BB_lower'].iloc[-1] if not pd.isna(df['BB_lower'].iloc[-1]) else current_price * 0.98
-    
-    # Calcular mudanças de preço
-    price_change_7d = ((current_price - df['Close'].iloc[-7]) / df['Close'].iloc[-7] * 100) if len(df) >= 7 else 0
-    price_change_30d = ((current_price - df['Close'].iloc[-30]) / df['Close'].iloc[-30] * 100) if len(df) >= 30 else 0
-    
-    # Análise de Tendência
-    if sma_short > sma_long:
-        if price_change_7d > 5:
-            analysis['trend'] = "Fortemente Altista"
-            analysis['signals'].append("🚀 Forte tendência de alta confirmada")
-        else:
-            analysis['trend'] = "Altista"
-            analysis['signals'].append("📈 Tendência de alta em progresso")
-    else:
-        if price_change_7d < -5:
-            analysis['trend'] = "Fortemente Baixista"
-            analysis['signals'].append("⚠️ Forte tendência de baixa detectada")
-        else:
-            analysis['trend'] = "Baixista"
-            analysis['signals'].append("📉 Tendência de baixa em progresso")
-    
-    # Análise de Momentum
-    if rsi > 70:
-        analysis['momentum'] = "Sobrecomprado"
-        analysis['signals'].append("⚠️ RSI indica condições de sobrecompra - possível correção à frente")
-    elif rsi < 30:
-        analysis['momentum'] = "Sobrevendido"
-        analysis['signals'].append("💡 RSI indica condições de sobrevenda - possível recuperação esperada")
-    elif 45 <= rsi <= 55:
-        analysis['momentum'] = "Neutro"
-        analysis['signals'].append("⚖️ Momentum está neutro - aguardando direção")
-    elif rsi > 55:
-        analysis['momentum'] = "Altista"
-        analysis['signals'].append("✅ Momentum positivo em construção")
-    else:
-        analysis['momentum'] = "Baixista"
-        analysis['signals'].append("⚠️ Momentum negativo presente")
-    
-    # Análise MACD
-    if macd > macd_signal:
-        if macd > 0:
-            analysis['signals'].append("🟢 MACD cruzamento altista - sinal de compra ativo")
-        else:
-            analysis['signals'].append("🟡 MACD virando altista - sinal de compra inicial")
-    else:
-        if macd < 0:
-            analysis['signals'].append("🔴 MACD cruzamento baixista - sinal de venda ativo")
-        else:
-            analysis['signals'].append("🟠 MACD virando baixista - cautela aconselhada")
-    
-    # Análise de Volatilidade
-    bb_width = ((bb_upper - bb_lower) / current_price) * 100
-    if bb_width > 10:
-        analysis['volatility'] = "Alta"
-        analysis['signals'].append("🌊 Alta volatilidade detectada - espere grandes oscilações de preço")
-    elif bb_width < 5:
-        analysis['volatility'] = "Baixa"
-        analysis['signals'].append("😴 Baixa volatilidade - possível rompimento chegando")
-    else:
-        analysis['volatility'] = "Moderada"
-    
-    # Posição nas Bandas de Bollinger
-    if current_price > bb_upper:
-        analysis['signals'].append("⚠️ Preço acima da Banda de Bollinger superior - sobreestendido")
-    elif current_price < bb_lower:
-        analysis['signals'].append("💡 Preço abaixo da Banda de Bollinger inferior - possível reversão")
-    
-    # Análise de Volume
-    avg_volume = df['Volume'].tail(20).mean()
-    current_volume = df['Volume'].iloc[-1]
-    volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
-    
-    if volume_ratio > 1.5:
-        analysis['volume'] = "Alto"
-        analysis['signals'].append("📊 Aumento de volume detectado - forte convicção no movimento atual")
-    elif volume_ratio < 0.5:
-        analysis['volume'] = "Baixo"
-        analysis['signals'].append("📉 Volume baixo - falta de convicção, tendência pode ser fraca")
-    else:
-        analysis['volume'] = "Normal"
-    
-    # Níveis Chave
-    recent_high = df['High'].tail(30).max()
-    recent_low = df['Low'].tail(30).min()
-    analysis['key_levels'] = {
-        'resistance': recent_high,
-        'support': recent_low,
-        'bb_upper': bb_upper,
-        'bb_lower': bb_lower
-    }
-    
-    # Gerar Previsão
-    bullish_signals = sum([
-        sma_short > sma_long,
-        rsi < 70 and rsi > 45,
-        macd > macd_signal,
-        price_change_7d > 0,
-        current_price > bb_lower
-    ])
-    
-    if bullish_signals >= 4:
-        analysis['prediction'] = "Forte Compra"
-        analysis['outlook'] = f"Com base nos indicadores técnicos, o Bitcoin mostra forte momentum altista. O preço está atualmente em ${current_price:,.2f} com múltiplos indicadores sugerindo movimento ascendente. A resistência chave está em ${recent_high:,.2f}. Se este nível for rompido, podemos ver ganhos adicionais em direção a ${recent_high * 1.05:,.2f}."
-    elif bullish_signals >= 3:
-        analysis['prediction'] = "Compra"
-        analysis['outlook'] = f"O Bitcoin está mostrando sinais positivos com o preço atual em ${current_price:,.2f}. A tendência é favorável, embora alguma cautela seja justificada. Observe o rompimento acima de ${recent_high:,.2f} para confirmação da continuação da tendência de alta."
-    elif bullish_signals == 2:
-        analysis['prediction'] = "Manter"
-        analysis['outlook'] = f"O Bitcoin está em fase de consolidação em ${current_price:,.2f}. Sinais mistos sugerem aguardar por direção mais clara. Níveis chave a observar: suporte em ${recent_low:,.2f} e resistência em ${recent_high:,.2f}."
-    elif bullish_signals == 1:
-        analysis['prediction'] = "Venda"
-        analysis['outlook'] = f"Indicadores técnicos sugerem fraqueza na ação de preço do Bitcoin em ${current_price:,.2f}. Considere reduzir exposição. O suporte crítico em ${recent_low:,.2f} deve se manter para prevenir declínio adicional."
-    else:
-        analysis['prediction'] = "Forte Venda"
-        analysis['outlook'] = f"Múltiplos sinais baixistas detectados com Bitcoin em ${current_price:,.2f}. O risco de queda está elevado. Se o suporte em ${recent_low:,.2f} for rompido, espere declínio adicional em direção a ${recent_low * 0.95:,.2f}."
-    
-    return analysis
+    df = calculate_indicators(df, ma_short, ma_long)
+    return calculate_risk_indicators(df, periods_per_year=periods_per_year(interval, df.index))
 
-# Buscar dados
-with st.spinner("🔄 Buscando dados do Bitcoin..."):
-    df = get_bitcoin_data(period_options[selected_period], interval_options[selected_interval])
+# Função para detectar zonas de suporte/resistência nos pivôs de todo o histórico
+@st.cache_data(ttl=300, max_entries=100)
+def get_price_zones(period, interval, data_token=None):
+    df = get_bitcoin_data(period, interval, data_token)
+    if df is None or df.empty:
+        return []
+    return detect_levels(df)
 
-if df is not None and not df.empty:
-    # Calcular indicadores
-    df = calculate_indicators(df, ma_short, ma_long)
-    
+# Função para gerar a análise de mercado
+@st.cache_data(ttl=300, max_entries=100)
+def get_market_analysis(period, interval, ma_short, ma_long, data_token=None):
+    df = get_indicator_data(period, interval, ma_short, ma_long, data_token)
+    price_zones = get_price_zones(period, interval, data_token)
+    return generate_market_analysis(df, ma_short, ma_long, price_zones)
+
+# Função para calcular volatilidade, ATR, drawdown e z-scores na janela escolhida
+@st.cache_data(ttl=300, max_entries=100)
+def get_risk_data(period, interval, risk_window, data_token=None):
+    df = get_bitcoin_data(period, interval, data_token)
+    if df is None or df.empty:
+        return None
+    return calculate_risk_indicators(df.copy(), risk_window, periods_per_year(interval, df.index))
+
+# Seção de métricas principais
+def render_metrics(df):
     # Preço atual e métricas
     current_price = df['Close'].iloc[-1]
     prev_price = df['Close'].iloc[-2]
@@ -489,65 +207,133 @@ if df is not None and not df.empty:
             )
     
     st.markdown("---")
+
+# Seção de análise de mercado
+def render_market_analysis(market_analysis):
+    st.markdown("## 🤖 Análise de Mercado com IA")
+    
+    # Caixa de Análise Principal
+    st.markdown(f"""
+    <div class="analysis-box">
+        <div class="analysis-header">
+            🎯 Avaliação Atual do Mercado
+        </div>
+        <div class="analysis-content">
+            <p><strong>Perspectiva Geral:</strong> {market_analysis['prediction']}</p>
+            <p>{market_analysis['outlook']}</p>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
     
-    # Gerar Análise de Mercado
-    market_analysis = generate_market_analysis(df, ma_short, ma_long)
+    # Previsões Detalhadas
+    col1, col2 = st.columns(2)
     
-    # Exibir Seção de Análise IA
-    if market_analysis:
-        st.markdown("## 🤖 Análise de Mercado com IA")
-        
-        # Caixa de Análise Principal
+    with col1:
         st.markdown(f"""
-        <div class="analysis-box">
-            <div class="analysis-header">
-                🎯 Avaliação Atual do Mercado
-            </div>
-            <div class="analysis-content">
-                <p><strong>Perspectiva Geral:</strong> {market_analysis['prediction']}</p>
-                <p>{market_analysis['outlook']}</p>
+        <div class="prediction-card">
+            <div class="prediction-title">📊 Resumo Técnico</div>
+            <div class="prediction-text">
+                <p><strong>Tendência:</strong> {market_analysis['trend']}</p>
+                <p><strong>Momentum:</strong> {market_analysis['momentum']}</p>
+                <p><strong>Volatilidade:</strong> {market_analysis['volatility']}</p>
+                <p><strong>Volume:</strong> {market_analysis['volume']}</p>
             </div>
         </div>
         """, unsafe_allow_html=True)
-        
-        # Previsões Detalhadas
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="prediction-card">
-                <div class="prediction-title">📊 Resumo Técnico</div>
-                <div class="prediction-text">
-                    <p><strong>Tendência:</strong> {market_analysis['trend']}</p>
-                    <p><strong>Momentum:</strong> {market_analysis['momentum']}</p>
-                    <p><strong>Volatilidade:</strong> {market_analysis['volatility']}</p>
-                    <p><strong>Volume:</strong> {market_analysis['volume']}</p>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="prediction-card">
-                <div class="prediction-title">🎯 Níveis de Preço Chave</div>
-                <div class="prediction-text">
-                    <p><strong>Resistência:</strong> ${market_analysis['key_levels']['resistance']:,.2f}</p>
-                    <p><strong>Suporte:</strong> ${market_analysis['key_levels']['support']:,.2f}</p>
-                    <p><strong>BB Superior:</strong> ${market_analysis['key_levels']['bb_upper']:,.2f}</p>
-                    <p><strong>BB Inferior:</strong> ${market_analysis['key_levels']['bb_lower']:,.2f}</p>
-                </div>
+    
+    with col2:
+        st.markdown(f"""
+        <div class="prediction-card">
+            <div class="prediction-title">🎯 Níveis de Preço Chave</div>
+            <div class="prediction-text">
+                <p><strong>Resistência:</strong> ${market_analysis['key_levels']['resistance']:,.2f}</p>
+                <p><strong>Suporte:</strong> ${market_analysis['key_levels']['support']:,.2f}</p>
+                <p><strong>BB Superior:</strong> ${market_analysis['key_levels']['bb_upper']:,.2f}</p>
+                <p><strong>BB Inferior:</strong> ${market_analysis['key_levels']['bb_lower']:,.2f}</p>
             </div>
-            """, unsafe_allow_html=True)
-        
-        # Sinais Chave
-        st.markdown("### 🔔 Sinais de Negociação Chave")
-        for signal in market_analysis['signals']:
-            st.markdown(f"- {signal}")
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Sinais Chave
+    st.markdown("### 🔔 Sinais de Negociação Chave")
+    for signal in market_analysis['signals']:
+        st.markdown(f"- {signal}")
+    
+    st.markdown("---")
+
+# Seção de confluência multi-timeframe; o checkbox só reexecuta esta seção
+@st.fragment
+def render_confluence_section(ma_short, ma_long):
+    st.markdown("## 🧭 Confluência Multi-Timeframe")
+    show_confluence = st.checkbox("Confluência 1h/4h/1d/1wk/1mo", value=False)
+    
+    if show_confluence:
+        with st.spinner("🔄 Calculando confluência entre timeframes..."):
+            # Token combinado das séries base (1h e 1d), lido a cada rerun do fragmento
+            confluence_token = tuple(
+                data_provider.cache_token("BTC-USD", base_interval) for base_interval in BASE_SERIES
+            )
+            confluence_matrix = get_confluence_matrix(ma_short, ma_long, confluence_token)
+        confluence_summary = summarize_confluence(confluence_matrix)
         
-        st.markdown("---")
+        if confluence_summary:
+            if confluence_summary['bullish'] > confluence_summary['bearish']:
+                box_class = 'success-box'
+            elif confluence_summary['bearish'] > confluence_summary['bullish']:
+                box_class = 'error-box'
+            else:
+                box_class = 'warning-box'
+            st.markdown(
+                f"<div class='{box_class}'>🧭 <strong>{confluence_summary['verdict']}</strong><br>"
+                f"{confluence_summary['bullish']} de {confluence_summary['total']} timeframes altistas, "
+                f"{confluence_summary['bearish']} baixistas | "
+                f"Pontuação média: {confluence_summary['average_score']:.1f}/5</div>",
+                unsafe_allow_html=True
+            )
+            
+            # Verde para componentes altistas, vermelho para baixistas
+            def color_score(column):
+                neutral = 2.5 if column.name == 'Pontuação' else 0
+                return [
+                    'color: #22c55e' if value > neutral else 'color: #ef4444' if value < neutral else 'color: #a0aec0'
+                    for value in column
+                ]
+            
+            score_columns = ['Tendência', 'Momentum', 'MACD', 'Bollinger', 'Pontuação']
+            st.dataframe(
+                confluence_matrix.style.apply(color_score, subset=score_columns),
+                use_container_width=True
+            )
+        else:
+            st.warning("Dados insuficientes para a análise multi-timeframe")
+    
+    st.markdown("---")
+
+# Seção do gráfico principal; os checkboxes só reconstroem o gráfico
+@st.fragment
+def render_chart_section(df, price_zones, ma_short, ma_long):
+    # Indicadores técnicos
+    st.markdown("### 📊 Indicadores Técnicos")
+    toggle_cols = st.columns(7)
+    with toggle_cols[0]:
+        show_sma = st.checkbox("Média Móvel Simples (SMA)", value=True)
+    with toggle_cols[1]:
+        show_ema = st.checkbox("Média Móvel Exponencial (EMA)", value=True)
+    with toggle_cols[2]:
+        show_bb = st.checkbox("Bandas de Bollinger", value=True)
+    with toggle_cols[3]:
+        show_rsi = st.checkbox("RSI", value=True)
+    with toggle_cols[4]:
+        show_macd = st.checkbox("MACD", value=True)
+    with toggle_cols[5]:
+        show_volume = st.checkbox("Volume", value=True)
+    with toggle_cols[6]:
+        show_levels = st.checkbox("Zonas de Suporte/Resistência", value=True)
+    
+    current_price = df['Close'].iloc[-1]
     
     # Criar gráfico principal com tema escuro
-    fig = make_subplots(
+    fig = plotly_subplots.make_subplots(
         rows=4, cols=1,
         shared_xaxes=True,
         vertical_spacing=0.03,
@@ -638,6 +424,22 @@ if df is not None and not df.empty:
             row=1, col=1
         )
     
+    # Zonas de suporte/resistência mais próximas do preço atual
+    if show_levels:
+        for zone in zones_near_price(price_zones, current_price):
+            zone_color = '#22c55e' if zone['kind'] == 'support' else '#ef4444'
+            fig.add_hrect(
+                y0=zone['low'],
+                y1=zone['high'],
+                fillcolor=zone_color,
+                opacity=0.15,
+                line_width=0,
+                annotation_text=f"{zone['touches']}x",
+                annotation_position="right",
+                annotation_font_color=zone_color,
+                row=1, col=1
+            )
+    
     # Volume com cores gradientes
     if show_volume:
         colors = ['#ef4444' if df['Close'].iloc[i] < df['Open'].iloc[i] else '#22c55e' 
@@ -732,7 +534,9 @@ if df is not None and not df.empty:
     fig.update_xaxes(gridcolor='#2d3748')
     
     st.plotly_chart(fig, use_container_width=True)
-    
+
+# Seção de sinais de negociação
+def render_trading_signals(df):
     # Sinais de negociação com caixas estilizadas personalizadas
     st.markdown("---")
     st.markdown("## 📊 Sinais de Negociação")
@@ -765,30 +569,97 @@ if df is not None and not df.empty:
                 st.markdown("<div class='success-box'>🟢 <strong>Altista</strong><br>MACD > Sinal</div>", unsafe_allow_html=True)
             else:
                 st.markdown("<div class='error-box'>🔴 <strong>Baixista</strong><br>MACD < Sinal</div>", unsafe_allow_html=True)
-    
+
+# Seção de análise de preços
+def render_price_analysis(df, key_levels):
     # Seção de análise de preços
     st.markdown("---")
     st.markdown("## 🔮 Análise de Preços")
     
-    # Calcular níveis de suporte e resistência
-    recent_high = df['High'].tail(30).max()
-    recent_low = df['Low'].tail(30).min()
-    
     col1, col2 = st.columns(2)
     
     with col1:
-        st.metric("🎯 Resistência 30 Dias", f"${recent_high:,.2f}")
-        st.metric("🛡️ Suporte 30 Dias", f"${recent_low:,.2f}")
+        resistance_touches = key_levels['resistance_touches']
+        support_touches = key_levels['support_touches']
+        st.metric(
+            "🎯 Resistência",
+            f"${key_levels['resistance']:,.2f}",
+            f"{resistance_touches} toques" if resistance_touches else "Máxima 30 barras",
+            delta_color="off"
+        )
+        st.metric(
+            "🛡️ Suporte",
+            f"${key_levels['support']:,.2f}",
+            f"{support_touches} toques" if support_touches else "Mínima 30 barras",
+            delta_color="off"
+        )
     
     with col2:
         avg_volume = df['Volume'].tail(30).mean()
         current_volume = df['Volume'].iloc[-1]
         volume_ratio = (current_volume / avg_volume) * 100 if avg_volume > 0 else 0
         st.metric("📊 Volume vs Média 30 Dias", f"{volume_ratio:.2f}%")
-        
-        volatility = df['Close'].tail(30).std()
-        st.metric("📉 Volatilidade 30 Dias", f"${volatility:,.2f}")
+
+# Seção de risco; o slider da janela só reexecuta esta seção
+@st.fragment
+def render_risk_section(period, interval, data_token):
+    st.markdown("### 📉 Risco e Volatilidade")
+    risk_window = st.slider("Janela de Volatilidade", 10, 90, 30)
+    df = get_risk_data(period, interval, risk_window, data_token)
+    
+    realized_volatility = df['RV'].iloc[-1]
+    if not pd.isna(realized_volatility):
+        st.metric(
+            f"📉 Volatilidade Realizada {risk_window} Barras",
+            f"{realized_volatility * 100:.2f}% a.a.",
+            f"ATR ${df['ATR'].iloc[-1]:,.2f}",
+            delta_color="off"
+        )
     
+    # Gráfico das estatísticas de risco
+    with st.expander("📉 Risco e Volatilidade"):
+        risk_fig = plotly_subplots.make_subplots(
+            rows=2, cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.05,
+            row_heights=[0.6, 0.4],
+            subplot_titles=(f'Volatilidade Anualizada ({risk_window} barras)', 'Drawdown')
+        )
+        for column, label, color in [
+            ('RV', 'Realizada', '#3b82f6'),
+            ('Parkinson', 'Parkinson', '#f59e0b'),
+            ('GK', 'Garman-Klass', '#8b5cf6'),
+        ]:
+            risk_fig.add_trace(
+                go.Scatter(x=df.index, y=df[column] * 100, name=label, line=dict(color=color, width=2)),
+                row=1, col=1
+            )
+        risk_fig.add_trace(
+            go.Scatter(
+                x=df.index,
+                y=df['Drawdown'] * 100,
+                name='Drawdown',
+                line=dict(color='#ef4444', width=1),
+                fill='tozeroy',
+                fillcolor='rgba(239, 68, 68, 0.2)'
+            ),
+            row=2, col=1
+        )
+        risk_fig.update_layout(
+            height=500,
+            hovermode='x unified',
+            template='plotly_dark',
+            plot_bgcolor='#0e1117',
+            paper_bgcolor='#0e1117',
+            font=dict(color='#e2e8f0')
+        )
+        risk_fig.update_yaxes(title_text="%", gridcolor='#2d3748')
+        risk_fig.update_xaxes(gridcolor='#2d3748')
+        st.plotly_chart(risk_fig, use_container_width=True)
+
+# Seção de dados históricos; os seletores de data só reexecutam esta seção
+@st.fragment
+def render_historical_data(df):
     # Tabela de dados históricos
     st.markdown("---")
     st.markdown("## 📈 Dados Históricos")
@@ -813,8 +684,9 @@ if df is not None and not df.empty:
     # Filtrar dados com base no intervalo de datas
     if not df.empty and len(df) > 0:
         try:
-            start_date_ts = pd.Timestamp(start_date)
-            end_date_ts = pd.Timestamp(end_date)
+            # Datas no mesmo fuso do índice (o yfinance retorna índice com fuso)
+            start_date_ts = pd.Timestamp(start_date).tz_localize(df.index.tz)
+            end_date_ts = pd.Timestamp(end_date).tz_localize(df.index.tz)
             
             # Garantir que as datas estejam dentro do intervalo
             if start_date_ts < df.index[0]:
@@ -852,19 +724,45 @@ if df is not None and not df.empty:
             st.error(f"Erro ao filtrar dados: {str(e)}")
     else:
         st.warning("Nenhum dado disponível para o intervalo de datas selecionado")
-    
+
+# Buscar dados e calcular a análise
+period = period_options[selected_period]
+interval = interval_options[selected_interval]
+# Token só da série exibida: barras novas de outros intervalos não invalidam o cache
+data_token = data_provider.cache_token("BTC-USD", interval)
+with st.spinner("🔄 Buscando dados do Bitcoin..."):
+    df = get_indicator_data(period, interval, ma_short, ma_long, data_token)
+
+# Métricas e variações precisam de ao menos duas barras
+if df is not None and len(df) > 1:
+    price_zones = get_price_zones(period, interval, data_token)
+    market_analysis = get_market_analysis(period, interval, ma_short, ma_long, data_token)
+    render_metrics(df)
+    render_market_analysis(market_analysis)
+    render_confluence_section(ma_short, ma_long)
+    render_chart_section(df, price_zones, ma_short, ma_long)
+    render_trading_signals(df)
+    render_price_analysis(df, market_analysis['key_levels'])
+    render_risk_section(period, interval, data_token)
+    render_historical_data(df)
 else:
     st.error("Não foi possível buscar dados do Bitcoin. Por favor, tente novamente mais tarde.")
 
 # Rodapé
 st.markdown("---")
-st.markdown("""
+st.markdown(f"""
     <div style='text-align: center; color: #a0aec0;'>
-        <p style='font-size: 14px;'>📊 Dados fornecidos pelo Yahoo Finance | 🔄 Atualizado a cada 5 minutos</p>
+        <p style='font-size: 14px;'>📊 Dados fornecidos por {data_provider.name} | 🔄 Atualizado a cada 5 minutos</p>
         <p style='font-size: 12px;'><em>⚠️ Este painel é apenas para fins educacionais. Não é aconselhamento financeiro.</em></p>
     </div>
     """, unsafe_allow_html=True)
 
+# Tempos de importação dos módulos carregados sob demanda
+if IMPORT_TIMES:
+    with st.sidebar.expander("⏱️ Tempos de Importação"):
+        for module_name, elapsed_ms in IMPORT_TIMES.items():
+            st.markdown(f"- `{module_name}`: {elapsed_ms:.1f} ms")
+
 # Função principal
 def main():
     pass
@@ -0,0 +1,438 @@
+import argparse
+import io
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+# Buffer circular limitado de negócios (timestamp em ns, preço, quantidade);
+# o produtor bloqueia quando está cheio, mantendo a memória constante
+class TradeRingBuffer:
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.prices = np.empty(capacity, dtype=np.float64)
+        self.sizes = np.empty(capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def push(self, timestamps, prices, sizes):
+        offset = 0
+        total = len(timestamps)
+        while offset < total:
+            with self._cond:
+                while self.count == self.capacity and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    raise ValueError("Buffer de negócios fechado")
+                n = min(total - offset, self.capacity - self.count)
+                tail = (self.head + self.count) % self.capacity
+                first = min(n, self.capacity - tail)
+                for dest, src in ((self.timestamps, timestamps), (self.prices, prices), (self.sizes, sizes)):
+                    dest[tail:tail + first] = src[offset:offset + first]
+                    dest[:n - first] = src[offset + first:offset + n]
+                self.count += n
+                offset += n
+                self._cond.notify_all()
+
+    # Retirar até max_n negócios; bloqueia até haver dados ou o buffer fechar
+    def pop(self, max_n=65536, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.count > 0 or self.closed, timeout):
+                return None
+            if self.count == 0:
+                return None
+            n = min(max_n, self.count)
+            index = (self.head + np.arange(n)) % self.capacity
+            chunk = (self.timestamps[index], self.prices[index], self.sizes[index])
+            self.head = (self.head + n) % self.capacity
+            self.count -= n
+            self._cond.notify_all()
+            return chunk
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+# Agregação vetorizada de negócios em barras OHLCV; cada lote recebe um
+# identificador de barra por negócio e a última barra fica em aberto até
+# chegar um negócio de outra barra (ou flush)
+class BarAggregator:
+    def __init__(self):
+        self.partial = None
+
+    def bar_ids(self, timestamps, sizes):
+        raise NotImplementedError
+
+    def bar_timestamp(self, bar_id, first_timestamp):
+        return first_timestamp
+
+    def process(self, timestamps, prices, sizes):
+        if len(timestamps) == 0:
+            return []
+        ids = self.bar_ids(timestamps, sizes)
+        starts = np.concatenate([[0], np.flatnonzero(ids[1:] != ids[:-1]) + 1])
+        ends = np.concatenate([starts[1:], [len(ids)]])
+
+        opens = prices[starts]
+        closes = prices[ends - 1]
+        highs = np.maximum.reduceat(prices, starts)
+        lows = np.minimum.reduceat(prices, starts)
+        volumes = np.add.reduceat(sizes, starts)
+        first_ts = timestamps[starts]
+        group_ids = ids[starts]
+
+        groups = [
+            [group_ids[i], first_ts[i], opens[i], highs[i], lows[i], closes[i], volumes[i]]
+            for i in range(len(starts))
+        ]
+
+        # Juntar o primeiro grupo à barra em aberto do lote anterior
+        completed = []
+        if self.partial is not None:
+            if self.partial[0] == groups[0][0]:
+                head = groups.pop(0)
+                self.partial[3] = max(self.partial[3], head[3])
+                self.partial[4] = min(self.partial[4], head[4])
+                self.partial[5] = head[5]
+                self.partial[6] += head[6]
+            if groups:
+                completed.append(self._finish(self.partial))
+                self.partial = None
+        if groups:
+            self.partial = groups.pop()
+        completed.extend(self._finish(group) for group in groups)
+        return completed
+
+    # Barra em aberto, sem fechá-la
+    def current(self):
+        return self._finish(self.partial) if self.partial is not None else None
+
+    def flush(self):
+        if self.partial is None:
+            return []
+        bar = self._finish(self.partial)
+        self.partial = None
+        return [bar]
+
+    def _finish(self, group):
+        bar_id, first_ts, o, h, l, c, v = group
+        return (self.bar_timestamp(bar_id, first_ts), o, h, l, c, v)
+
+
+# Barras de tempo fixo, alinhadas ao início do período
+class TimeBarAggregator(BarAggregator):
+    def __init__(self, duration):
+        super().__init__()
+        self.duration_ns = pd.Timedelta(duration).value
+
+    def bar_ids(self, timestamps, sizes):
+        return timestamps // self.duration_ns
+
+    def bar_timestamp(self, bar_id, first_timestamp):
+        return bar_id * self.duration_ns
+
+
+# Barras de N negócios
+class TickBarAggregator(BarAggregator):
+    def __init__(self, ticks):
+        super().__init__()
+        self.ticks = ticks
+        self.seen = 0
+
+    def bar_ids(self, timestamps, sizes):
+        ids = (self.seen + np.arange(len(timestamps))) // self.ticks
+        self.seen += len(timestamps)
+        return ids
+
+
+# Barras de volume: um negócio pertence à barra em que o volume acumulado
+# antes dele cai (negócios não são divididos entre barras)
+class VolumeBarAggregator(BarAggregator):
+    def __init__(self, volume):
+        super().__init__()
+        self.volume = volume
+        self.cumulative = 0.0
+
+    def bar_ids(self, timestamps, sizes):
+        before = self.cumulative + np.cumsum(sizes) - sizes
+        self.cumulative = before[-1] + sizes[-1]
+        return np.floor(before / self.volume).astype(np.int64)
+
+
+# Criar o agregador a partir de uma especificação: "5min"/"1h" (tempo),
+# "1000t" (negócios) ou "50v" (volume)
+def create_aggregator(spec):
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([tv])', spec)
+    if match:
+        amount, kind = match.groups()
+        if kind == 't':
+            return TickBarAggregator(int(float(amount)))
+        return VolumeBarAggregator(float(amount))
+    try:
+        return TimeBarAggregator(spec)
+    except ValueError:
+        raise ValueError(f"Especificação de barra inválida: {spec!r}") from None
+
+
+# Pipeline: fonte de negócios -> buffer circular -> agregador -> barras
+# recentes (no máximo max_bars, memória constante)
+class BarBuilder:
+    def __init__(self, spec, capacity=1 << 20, max_bars=10000, chunk=65536):
+        self.aggregator = create_aggregator(spec)
+        self.capacity = capacity
+        # Alocado só por feed; consume agrega direto, sem buffer
+        self.buffer = None
+        self.bars = deque(maxlen=max_bars)
+        self.chunk = chunk
+        self.trades = 0
+        self._lock = threading.Lock()
+
+    # Consumir o buffer até ele ser fechado e esvaziado
+    def run(self):
+        while True:
+            chunk = self.buffer.pop(self.chunk)
+            if chunk is None:
+                break
+            self._add(self.aggregator.process(*chunk), len(chunk[0]))
+        self._add(self.aggregator.flush(), 0)
+
+    def _add(self, bars, trades):
+        with self._lock:
+            self.bars.extend(bars)
+            self.trades += trades
+
+    # Alimentar o pipeline a partir de uma fonte de lotes (ts, preço, qtd)
+    def feed(self, source):
+        self.buffer = TradeRingBuffer(self.capacity)
+        consumer = threading.Thread(target=self.run, daemon=True)
+        consumer.start()
+        try:
+            for timestamps, prices, sizes in source:
+                self.buffer.push(timestamps, prices, sizes)
+        finally:
+            self.buffer.close()
+        consumer.join()
+        return self.to_frame()
+
+    # Agregar lotes na thread atual sem fechar a última barra, para fontes
+    # que continuam crescendo (ex.: arquivo de negócios lido incrementalmente);
+    # não passa pelo buffer circular, a memória é limitada pelo tamanho do lote
+    def consume(self, source):
+        for timestamps, prices, sizes in source:
+            self._add(self.aggregator.process(timestamps, prices, sizes), len(timestamps))
+
+    # Barras concluídas (e opcionalmente a barra em aberto) no formato de
+    # get_bitcoin_data/calculate_indicators
+    def to_frame(self, include_open=False):
+        with self._lock:
+            bars = list(self.bars)
+            current = self.aggregator.current() if include_open else None
+        if current is not None:
+            bars.append(current)
+        if not bars:
+            return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+        timestamps, *values = zip(*bars)
+        index = pd.to_datetime(np.array(timestamps, dtype=np.int64), utc=True)
+        return pd.DataFrame(dict(zip(BAR_COLUMNS, values)), index=index)
+
+
+def _to_nanoseconds(values):
+    if np.issubdtype(values.dtype, np.number):
+        # Epoch numérico: segundos, milissegundos, microssegundos ou
+        # nanossegundos pela magnitude
+        first = values[0]
+        scale = 10 ** 9 if first < 1e11 else 10 ** 6 if first < 1e14 else 10 ** 3 if first < 1e17 else 1
+        if np.issubdtype(values.dtype, np.integer):
+            return values.astype(np.int64) * scale
+        return np.round(values.astype(np.float64) * scale).astype(np.int64)
+    # O pandas 3 analisa textos em microssegundos; normalizar para ns
+    return pd.to_datetime(values, utc=True).as_unit('ns').asi8
+
+
+# Ler negócios de um CSV (colunas timestamp, price, size) em lotes
+def read_trades_csv(path, chunksize=262144):
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield _frame_to_trades(chunk)
+
+
+# Leitura incremental de um CSV de negócios que recebe novas linhas: cada
+# chamada de read_new lê só os bytes após a última linha completa já lida,
+# em blocos de tamanho fixo
+class TradesFileReader:
+    def __init__(self, path, block=1 << 24, prefix_size=4096):
+        self.path = path
+        self.block = block
+        self.prefix_size = prefix_size
+        self.offset = 0
+        self.columns = None
+        # Identidade do arquivo lido: inode e primeiros bytes já consumidos
+        self.inode = None
+        self.prefix = b''
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+    # O arquivo ainda é o mesmo que foi lido até offset, só com linhas
+    # acrescentadas (não foi substituído, reescrito nem truncado)
+    def unchanged(self):
+        if self.offset == 0:
+            return True
+        try:
+            stat = os.stat(self.path)
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                return False
+            with open(self.path, 'rb') as f:
+                return f.read(len(self.prefix)) == self.prefix
+        except OSError:
+            return False
+
+    def read_new(self):
+        with open(self.path, 'rb') as f:
+            if self.inode is None:
+                self.inode = os.fstat(f.fileno()).st_ino
+            f.seek(self.offset)
+            remainder = b''
+            while True:
+                data = f.read(self.block)
+                if not data:
+                    break
+                data = remainder + data
+                end = data.rfind(b'\n') + 1
+                if end == 0:
+                    remainder = data
+                    continue
+                remainder = data[end:]
+                if self.offset == 0:
+                    self.prefix = data[:min(end, self.prefix_size)]
+                self.offset += end
+                lines = data[:end]
+                if self.columns is None:
+                    header, _, lines = lines.partition(b'\n')
+                    self.columns = header.decode().strip().split(',')
+                if lines.strip():
+                    yield _frame_to_trades(pd.read_csv(io.BytesIO(lines), names=self.columns))
+
+
+def _frame_to_trades(chunk):
+    return (
+        _to_nanoseconds(chunk['timestamp'].to_numpy()),
+        chunk['price'].to_numpy(dtype=np.float64),
+        chunk['size'].to_numpy(dtype=np.float64),
+    )
+
+
+# Ler negócios de um socket TCP, uma linha "timestamp,price,size" por negócio
+# (substituto de um feed real de corretora)
+def socket_trades(host, port, batch=65536):
+    with socket.create_connection((host, port)) as conn:
+        stream = conn.makefile('r')
+        lines = []
+        for line in stream:
+            lines.append(line)
+            if len(lines) >= batch:
+                yield _parse_lines(lines)
+                lines = []
+        if lines:
+            yield _parse_lines(lines)
+
+
+def _parse_lines(lines):
+    data = np.loadtxt(lines, delimiter=',', ndmin=2)
+    return _to_nanoseconds(data[:, 0]), data[:, 1], data[:, 2]
+
+
+# Negócios sintéticos para testes de vazão
+def synthetic_trades(total, batch=262144, start=None, rate=50, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamp = pd.Timestamp(start or '2024-01-01', tz='UTC').value
+    price = 30000.0
+    produced = 0
+    while produced < total:
+        n = min(batch, total - produced)
+        timestamps = timestamp + np.cumsum(rng.exponential(1e9 / rate, n)).astype(np.int64)
+        prices = price * np.exp(np.cumsum(rng.normal(0, 1e-4, n)))
+        sizes = rng.exponential(0.05, n)
+        timestamp, price = timestamps[-1], prices[-1]
+        produced += n
+        yield timestamps, prices, sizes
+
+
+# Verificação: os mesmos negócios com timestamps em texto ISO e em epoch
+# (segundos, ms, µs) devem gerar as mesmas barras
+def check_timestamp_formats(total=5000, step_seconds=7, spec='5min'):
+    index = pd.date_range('2024-01-01', periods=total, freq=f'{step_seconds}s', tz='UTC')
+    prices = 30000 + np.arange(total, dtype=np.float64)
+    sizes = np.ones(total)
+    epoch_ns = index.as_unit('ns').asi8
+    formats = {
+        'iso': np.array(index.strftime('%Y-%m-%d %H:%M:%S'), dtype=object),
+        's': epoch_ns // 10 ** 9,
+        'ms': epoch_ns // 10 ** 6,
+        'us': epoch_ns // 10 ** 3,
+    }
+    frames = {
+        name: BarBuilder(spec).feed([(_to_nanoseconds(values), prices, sizes)])
+        for name, values in formats.items()
+    }
+    expected = len(pd.Series(1, index=index).resample(spec).size())
+    return {
+        name: len(df) == expected and df.index[0] == index[0] and df.equals(frames['s'])
+        for name, df in frames.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construir barras OHLCV a partir de negócios")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help="CSV com colunas timestamp, price, size")
+    source.add_argument('--socket', help="host:porta com linhas timestamp,price,size")
+    source.add_argument('--synthetic', type=int, help="Número de negócios sintéticos")
+    source.add_argument('--check', action='store_true',
+                        help="Verificar a leitura de timestamps em texto ISO e em epoch")
+    parser.add_argument('--spec', default='1min', help="Barra: 5min, 1h, 1000t (negócios) ou 50v (volume)")
+    parser.add_argument('--output', help="Gravar as barras neste CSV")
+    args = parser.parse_args()
+
+    if args.check:
+        results = check_timestamp_formats()
+        for name, ok in results.items():
+            print(f"{name}: {'ok' if ok else 'ERRO'}")
+        if not all(results.values()):
+            sys.exit(1)
+        return
+
+    if args.file:
+        trades = read_trades_csv(args.file)
+    elif args.socket:
+        host, _, port = args.socket.rpartition(':')
+        trades = socket_trades(host, int(port))
+    else:
+        trades = synthetic_trades(args.synthetic)
+
+    builder = BarBuilder(args.spec)
+    start = time.perf_counter()
+    bars = builder.feed(trades)
+    elapsed = time.perf_counter() - start
+
+    print(f"{builder.trades} negócios -> {len(bars)} barras em {elapsed:.2f} s "
+          f"({builder.trades / elapsed:,.0f} negócios/s)")
+    if args.output:
+        bars.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    main()
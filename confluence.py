@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analysis import calculate_indicators, generate_market_analysis
+
+# Séries base buscadas na fonte (intervalo -> período)
+BASE_SERIES = {
+    "1h": "1y",
+    "1d": "max",
+}
+
+# Timeframes da confluência: (série base, regra de reamostragem ou None)
+TIMEFRAMES = {
+    "1h": ("1h", None),
+    "4h": ("1h", "4h"),
+    "1d": ("1d", None),
+    "1wk": ("1d", "W-MON"),
+    "1mo": ("1d", "MS"),
+}
+
+# Pontuação numérica dos rótulos de generate_market_analysis
+TREND_SCORES = {
+    "Fortemente Altista": 2,
+    "Altista": 1,
+    "Baixista": -1,
+    "Fortemente Baixista": -2,
+}
+MOMENTUM_SCORES = {
+    "Sobrevendido": 1,
+    "Altista": 1,
+    "Neutro": 0,
+    "Baixista": -1,
+    "Sobrecomprado": -1,
+}
+BULLISH_PREDICTIONS = ("Forte Compra", "Compra")
+BEARISH_PREDICTIONS = ("Forte Venda", "Venda")
+
+OHLCV_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+
+# Reamostrar barras OHLCV para um intervalo maior
+def resample_ohlcv(df, rule):
+    if df is None or df.empty:
+        return df
+    resampled = df[list(OHLCV_AGG)].resample(rule, label="left", closed="left").agg(OHLCV_AGG)
+    return resampled.dropna(subset=["Close"])
+
+
+# Buscar as séries base em paralelo; fetch(period, interval) -> DataFrame
+def load_base_series(fetch):
+    with ThreadPoolExecutor(max_workers=len(BASE_SERIES)) as executor:
+        futures = {
+            interval: executor.submit(fetch, period, interval)
+            for interval, period in BASE_SERIES.items()
+        }
+        return {interval: future.result() for interval, future in futures.items()}
+
+
+# Calcular indicadores e análise de um único timeframe
+def analyze_timeframe(base_df, rule, ma_short, ma_long):
+    if base_df is None or base_df.empty:
+        return None, None
+    df = resample_ohlcv(base_df, rule) if rule else base_df.copy()
+    if len(df) < 2:
+        return None, None
+    df = calculate_indicators(df, ma_short, ma_long)
+    return df, generate_market_analysis(df, ma_short, ma_long)
+
+
+def _macd_score(df):
+    macd = df["MACD"].iloc[-1]
+    macd_signal = df["MACD_signal"].iloc[-1]
+    if pd.isna(macd) or pd.isna(macd_signal):
+        return 0
+    return 1 if macd > macd_signal else -1
+
+
+def _bollinger_score(df):
+    close = df["Close"].iloc[-1]
+    if not pd.isna(df["BB_upper"].iloc[-1]) and close > df["BB_upper"].iloc[-1]:
+        return -1
+    if not pd.isna(df["BB_lower"].iloc[-1]) and close < df["BB_lower"].iloc[-1]:
+        return 1
+    return 0
+
+
+# Calcular a matriz de confluência para todos os timeframes em paralelo
+def compute_confluence(base_series, ma_short=20, ma_long=50):
+    with ThreadPoolExecutor(max_workers=len(TIMEFRAMES)) as executor:
+        futures = {
+            timeframe: executor.submit(analyze_timeframe, base_series.get(base), rule, ma_short, ma_long)
+            for timeframe, (base, rule) in TIMEFRAMES.items()
+        }
+        results = {timeframe: future.result() for timeframe, future in futures.items()}
+
+    rows = {}
+    for timeframe, (df, analysis) in results.items():
+        if analysis is None:
+            continue
+        rows[timeframe] = {
+            "Tendência": TREND_SCORES.get(analysis["trend"], 0),
+            "Momentum": MOMENTUM_SCORES.get(analysis["momentum"], 0),
+            "MACD": _macd_score(df),
+            "Bollinger": _bollinger_score(df),
+            "Pontuação": analysis["score"],
+            "Perspectiva": analysis["prediction"],
+        }
+
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+# Resumir o alinhamento entre timeframes
+def summarize_confluence(matrix):
+    if matrix is None or matrix.empty:
+        return None
+    bullish = int(matrix["Perspectiva"].isin(BULLISH_PREDICTIONS).sum())
+    bearish = int(matrix["Perspectiva"].isin(BEARISH_PREDICTIONS).sum())
+    total = len(matrix)
+
+    if bullish == total:
+        verdict = "Confluência Altista"
+    elif bearish == total:
+        verdict = "Confluência Baixista"
+    elif bullish > bearish:
+        verdict = "Maioria Altista"
+    elif bearish > bullish:
+        verdict = "Maioria Baixista"
+    else:
+        verdict = "Sem Confluência"
+
+    return {
+        "verdict": verdict,
+        "bullish": bullish,
+        "bearish": bearish,
+        "total": total,
+        "average_score": float(matrix["Pontuação"].mean()),
+    }
@@ -0,0 +1,92 @@
+import math
+from collections import deque
+
+
+# Média móvel exponencial incremental (equivalente a ewm(adjust=False))
+class IncrementalEMA:
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.count = 0
+        self.mean = None
+
+    def update(self, x):
+        if x is None:
+            return self.value
+        self.count += 1
+        if self.mean is None:
+            self.mean = x
+        else:
+            self.mean = self.alpha * x + (1 - self.alpha) * self.mean
+        return self.value
+
+    @property
+    def value(self):
+        return self.mean if self.count >= self.min_periods else None
+
+
+# Média e desvio padrão incrementais sobre uma janela deslizante
+class SlidingMeanStd:
+    def __init__(self, window, ddof=0):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.updates = 0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self.updates += 1
+        # Ressincronizar as somas periodicamente para não acumular erro
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    @property
+    def std(self):
+        n = len(self.values)
+        if n <= self.ddof:
+            return None
+        mean = self.mean
+        return math.sqrt(max((self.total_sq - n * mean * mean) / (n - self.ddof), 0.0))
+
+
+
+# Máximo incremental sobre uma janela deslizante (deque monotônico)
+class SlidingMax:
+    def __init__(self, window):
+        self.window = window
+        self.candidates = deque()
+        self.count = 0
+
+    def update(self, x):
+        while self.candidates and self.candidates[-1][1] <= x:
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        if self.candidates[0][0] <= self.count - self.window:
+            self.candidates.popleft()
+        self.count += 1
+        return self.value
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    @property
+    def value(self):
+        return self.candidates[0][1] if self.ready else None
@@ -0,0 +1,42 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tempo de importação (ms) de cada módulo carregado sob demanda
+IMPORT_TIMES = {}
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Proxy que só importa o módulo real no primeiro acesso a um atributo."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    IMPORT_TIMES[self._name] = elapsed_ms
+                    logger.info("Importação de %s: %.1f ms", self._name, elapsed_ms)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        status = "carregado" if self._module is not None else "pendente"
+        return f"<LazyModule {self._name} ({status})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
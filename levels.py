@@ -0,0 +1,161 @@
+import argparse
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# Extremo móvel em O(n) com deque monotônico; out[i] cobre values[i-window+1..i]
+def _rolling_extreme(values, window, keep):
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    candidates = deque()
+    for i, value in enumerate(values):
+        # Descartar candidatos que nunca mais serão o extremo
+        while candidates and not keep(values[candidates[-1]], value):
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            out[i] = values[candidates[0]]
+    return out
+
+
+def rolling_max(values, window):
+    return _rolling_extreme(values, window, lambda kept, new: kept > new)
+
+
+def rolling_min(values, window):
+    return _rolling_extreme(values, window, lambda kept, new: kept < new)
+
+
+# Encontrar pivôs de topo e fundo: extremos numa janela centrada de 2*order+1 barras
+def find_pivots(df, order=5):
+    window = 2 * order + 1
+    highs = df['High'].to_numpy(dtype=float)
+    lows = df['Low'].to_numpy(dtype=float)
+
+    # O extremo da janela que termina em i+order é o da janela centrada em i
+    centered_max = np.roll(rolling_max(highs, window), -order)
+    centered_min = np.roll(rolling_min(lows, window), -order)
+    # As últimas barras ainda não têm confirmação à direita
+    centered_max[len(highs) - order:] = np.nan
+    centered_min[len(lows) - order:] = np.nan
+
+    pivot_highs = _collapse_ties(np.flatnonzero(highs == centered_max), highs, order)
+    pivot_lows = _collapse_ties(np.flatnonzero(lows == centered_min), lows, order)
+    return pivot_highs, pivot_lows
+
+
+# Topos/fundos planos (mesmo preço em barras a até order de distância) contam
+# como um único toque: mantém só o primeiro pivô de cada sequência empatada
+def _collapse_ties(pivots, values, order):
+    if len(pivots) < 2:
+        return pivots
+    tied = (np.diff(pivots) <= order) & (values[pivots[1:]] == values[pivots[:-1]])
+    return pivots[np.concatenate([[True], ~tied])]
+
+
+# Agrupar preços de pivôs em zonas com tolerância relativa
+def cluster_levels(prices, timestamps, tolerance=0.01):
+    if len(prices) == 0:
+        return []
+    order = np.argsort(prices)
+    prices = np.asarray(prices, dtype=float)[order]
+    timestamps = np.asarray(timestamps)[order]
+
+    # Nova zona quando o preço se afasta mais que a tolerância do primeiro
+    # preço da zona (e não do pivô anterior), limitando a largura da zona;
+    # comparar com o vizinho encadeava históricos densos em zonas enormes
+    breaks = []
+    anchor = prices[0]
+    for i in range(1, len(prices)):
+        if prices[i] > anchor * (1 + tolerance):
+            breaks.append(i)
+            anchor = prices[i]
+    zones = []
+    for group in np.split(np.arange(len(prices)), breaks):
+        zones.append({
+            'low': float(prices[group].min()),
+            'high': float(prices[group].max()),
+            'price': float(prices[group].mean()),
+            'touches': len(group),
+            'last_touch': pd.Timestamp(timestamps[group].max()),
+        })
+    return zones
+
+
+# Detectar zonas de suporte/resistência sobre todo o histórico
+def detect_levels(df, order=5, tolerance=0.01, min_touches=2):
+    if df is None or len(df) < 2 * order + 1:
+        return []
+
+    pivot_highs, pivot_lows = find_pivots(df, order)
+    prices = np.concatenate([
+        df['High'].to_numpy(dtype=float)[pivot_highs],
+        df['Low'].to_numpy(dtype=float)[pivot_lows],
+    ])
+    timestamps = np.concatenate([df.index[pivot_highs], df.index[pivot_lows]])
+
+    zones = [z for z in cluster_levels(prices, timestamps, tolerance) if z['touches'] >= min_touches]
+
+    current_price = df['Close'].iloc[-1]
+    for zone in zones:
+        zone['kind'] = 'support' if zone['price'] < current_price else 'resistance'
+    return zones
+
+
+# Zonas mais próximas abaixo (suporte) e acima (resistência) do preço
+def nearest_levels(zones, price):
+    supports = [z for z in zones if z['high'] < price]
+    resistances = [z for z in zones if z['low'] > price]
+    support = max(supports, key=lambda z: z['price']) if supports else None
+    resistance = min(resistances, key=lambda z: z['price']) if resistances else None
+    return support, resistance
+
+
+# Selecionar as zonas mais próximas do preço de cada lado, para desenho
+def zones_near_price(zones, price, count=3):
+    below = sorted((z for z in zones if z['price'] < price), key=lambda z: price - z['price'])
+    above = sorted((z for z in zones if z['price'] >= price), key=lambda z: z['price'] - price)
+    return below[:count] + above[:count]
+
+
+# Verificação: num passeio aleatório longo nenhuma zona pode passar de
+# ~2x a tolerância de largura relativa
+def check_zone_width(bars=100000, tolerance=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2010-01-01', periods=bars, freq='h', tz='UTC')
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    spread = rng.uniform(0, 0.005, bars)
+    df = pd.DataFrame({
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+    }, index=index)
+    zones = detect_levels(df, tolerance=tolerance)
+    widest = max(((z['high'] - z['low']) / z['price'] for z in zones), default=0.0)
+    support, resistance = nearest_levels(zones, close[-1])
+    return len(zones), widest, support, resistance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificar a largura das zonas de suporte/resistência")
+    parser.add_argument('--bars', type=int, default=100000)
+    parser.add_argument('--tolerance', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    count, widest, support, resistance = check_zone_width(args.bars, args.tolerance, args.seed)
+    print(f"{count} zonas, largura máxima {widest:.2%}")
+    for label, zone in (("Suporte", support), ("Resistência", resistance)):
+        print(f"{label}: " + (f"{zone['low']:,.2f}-{zone['high']:,.2f} ({zone['touches']} toques)" if zone else "nenhum"))
+    if widest > 2 * args.tolerance:
+        print(f"Zona mais larga que {2 * args.tolerance:.2%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
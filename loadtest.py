@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Frequência pandas usada para gerar as séries sintéticas de cada intervalo
+SYNTHETIC_INTERVALS = {
+    "1h": ("h", 24 * 365 * 2),
+    "1d": ("D", 365 * 8),
+    "1wk": ("W-MON", 52 * 8),
+    "1mo": ("MS", 12 * 8),
+}
+
+# Interações possíveis: (tipo de widget, rótulo, valores)
+INTERACTIONS = [
+    ("selectbox", "📅 Selecionar Período", ["1 Mês", "3 Meses", "6 Meses", "1 Ano", "2 Anos", "5 Anos", "Máximo"]),
+    ("selectbox", "⏱️ Selecionar Intervalo", ["1 Dia", "1 Semana", "1 Mês"]),
+    ("slider", "Período Curto", range(5, 51)),
+    ("slider", "Período Longo", range(50, 201)),
+    ("slider", "Janela de Volatilidade", range(10, 91)),
+    ("checkbox", "Média Móvel Simples (SMA)", None),
+    ("checkbox", "Média Móvel Exponencial (EMA)", None),
+    ("checkbox", "Bandas de Bollinger", None),
+    ("checkbox", "RSI", None),
+    ("checkbox", "MACD", None),
+    ("checkbox", "Volume", None),
+    ("checkbox", "Zonas de Suporte/Resistência", None),
+    ("checkbox", "Confluência 1h/4h/1d/1wk/1mo", None),
+]
+
+
+# Gerar séries OHLCV sintéticas (passeio aleatório geométrico) em CSV
+def write_synthetic_data(data_dir, symbol="BTC-USD", seed=0):
+    rng = np.random.default_rng(seed)
+    for interval, (freq, bars) in SYNTHETIC_INTERVALS.items():
+        index = pd.date_range(end=pd.Timestamp.now(tz="UTC").floor("D"), periods=bars, freq=freq)
+        close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, bars))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, bars))
+        volume = rng.uniform(1e9, 5e9, bars)
+        df = pd.DataFrame(
+            {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+            index=index,
+        )
+        df.to_csv(os.path.join(data_dir, f"{symbol}_{interval}.csv"))
+
+
+def _find_widget(at, kind, label):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    return None
+
+
+# Aplicar uma interação aleatória; retorna a descrição ou None se o widget não existe
+def apply_random_interaction(at, rng):
+    kind, label, values = rng.choice(INTERACTIONS)
+    widget = _find_widget(at, kind, label)
+    if widget is None:
+        return None
+    if kind == "checkbox":
+        value = not widget.value
+    else:
+        value = rng.choice(list(values))
+    widget.set_value(value)
+    return f"{label}={value}"
+
+
+# Sessão simulada: primeira execução seguida de interações aleatórias
+def run_session(session_id, interactions, timeout, seed, latencies, errors, lock):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for step in range(interactions + 1):
+        if step > 0 and apply_random_interaction(at, rng) is None:
+            continue
+        start = time.perf_counter()
+        try:
+            at.run()
+            failed = len(at.exception) > 0
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if failed:
+                errors.append(session_id)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        # ru_maxrss é o pico, em KB no Linux e bytes no macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# Executar N sessões simultâneas e medir latência, CPU e memória
+def run_level(sessions, interactions, timeout, seed):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(i, interactions, timeout, seed, latencies, errors, lock),
+        )
+        for i in range(sessions)
+    ]
+
+    cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = _cpu_seconds() - cpu_start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": len(errors),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "reruns_per_s": len(latencies) / wall,
+        "cpu_pct": cpu / wall * 100,
+        "rss_mb": _rss_mb(),
+    }
+
+
+def print_report(results):
+    header = f"{'sessões':>8} {'reruns':>7} {'erros':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'reruns/s':>9} {'CPU %':>7} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['sessions']:>8} {r['reruns']:>7} {r['errors']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+            f"{r['p99_ms']:>9.1f} {r['reruns_per_s']:>9.1f} {r['cpu_pct']:>7.0f} {r['rss_mb']:>8.0f}"
+        )
+
+
+# Executar todos os níveis de concorrência sobre os dados de data_dir
+def run_levels(args, data_dir):
+    # A fonte é lida pelo app na primeira execução
+    os.environ["BTC_DASHBOARD_PROVIDER"] = "replay"
+    os.environ["BTC_DASHBOARD_DATA_DIR"] = data_dir
+    os.environ["BTC_DASHBOARD_REPLAY_SPEED"] = str(args.replay_speed)
+
+    # Aquecer importações e caches para não contaminar o primeiro nível
+    run_level(1, 0, args.timeout, args.seed)
+
+    results = []
+    for sessions in args.levels:
+        result = run_level(sessions, args.interactions, args.timeout, args.seed)
+        print(f"{sessions} sessões: p95 {result['p95_ms']:.1f} ms", file=sys.stderr)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga de reruns do painel com sessões simultâneas")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Números de sessões simultâneas a testar")
+    parser.add_argument("--interactions", type=int, default=10, help="Interações por sessão")
+    parser.add_argument("--data-dir", help="Dados gravados (padrão: séries sintéticas temporárias)")
+    parser.add_argument("--replay-speed", type=float, default=3600,
+                        help="Segundos de dados reproduzidos por segundo real")
+    parser.add_argument("--timeout", type=float, default=120, help="Tempo máximo de cada rerun (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Gravar os resultados neste arquivo JSON")
+    parser.add_argument("--max-p95", type=float, help="Falhar se o p95 (ms) de algum nível exceder este valor")
+    args = parser.parse_args()
+
+    if args.data_dir is not None:
+        results = run_levels(args, args.data_dir)
+    else:
+        # Séries sintéticas em diretório temporário, removido ao final
+        with tempfile.TemporaryDirectory(prefix="btc_dashboard_loadtest_") as data_dir:
+            write_synthetic_data(data_dir, seed=args.seed)
+            results = run_levels(args, data_dir)
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_p95 is not None and any(r["p95_ms"] > args.max_p95 for r in results):
+        print(f"p95 acima do limite de {args.max_p95:.0f} ms")
+        sys.exit(1)
+    if any(r["errors"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import argparse
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+from bars import BarBuilder, TradesFileReader
+from confluence import TIMEFRAMES, resample_ohlcv
+from lazy_imports import lazy_import
+
+yf = lazy_import("yfinance")
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+# Converter um período do yfinance ("5d", "3mo", "1y", "max") em Timedelta
+def period_to_timedelta(period):
+    if period in (None, 'max'):
+        return None
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Período inválido: {period!r}")
+    amount, unit = int(match.group(1)), match.group(2)
+    days = {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}[unit]
+    return pd.Timedelta(days=amount * days)
+
+
+# Recortar o DataFrame para o período pedido, contado a partir da última barra
+def slice_period(df, period):
+    delta = period_to_timedelta(period)
+    if delta is None or df.empty:
+        return df
+    return df.loc[df.index > df.index[-1] - delta]
+
+
+# Interface comum das fontes de dados
+class DataProvider:
+    name = ""
+    # Intervalos oferecidos no painel (rótulo -> intervalo); None usa o padrão
+    interval_options = None
+
+    def history(self, symbol, period, interval):
+        raise NotImplementedError
+
+    def history_many(self, symbols, period, interval):
+        return {symbol: self.history(symbol, period, interval) for symbol in symbols}
+
+    # Muda sempre que os dados de (symbol, interval) mudam (usado como chave
+    # de cache); sem argumentos, muda com qualquer dado da fonte
+    def cache_token(self, symbol=None, interval=None):
+        return None
+
+
+# Dados do Yahoo Finance
+class YFinanceProvider(DataProvider):
+    name = "Yahoo Finance"
+
+    def history(self, symbol, period, interval):
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    # Vários ativos em uma única requisição
+    def history_many(self, symbols, period, interval):
+        data = yf.download(symbols, period=period, interval=interval, group_by='ticker',
+                           progress=False, threads=True)
+        history = {}
+        for symbol in symbols:
+            # Versões recentes retornam colunas MultiIndex mesmo para um ativo
+            df = data[symbol] if isinstance(data.columns, pd.MultiIndex) else data
+            history[symbol] = df[OHLCV_COLUMNS].dropna(subset=['Close'])
+        return history
+
+
+# Dados gravados em disco: <diretório>/<ativo>_<intervalo>.parquet ou .csv
+class LocalFileProvider(DataProvider):
+    name = "Arquivos locais"
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, symbol, interval):
+        for extension in ('parquet', 'csv'):
+            path = os.path.join(self.data_dir, f"{symbol}_{interval}.{extension}")
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"Sem dados locais para {symbol} {interval} em {self.data_dir}")
+
+    # Intervalo sem arquivo próprio derivado de uma série gravada, como na
+    # confluência (4h de 1h, 1wk e 1mo de 1d): (intervalo base, regra) ou None
+    def derivation(self, symbol, interval):
+        base, rule = TIMEFRAMES.get(interval, (None, None))
+        if rule is None or self._exists(symbol, interval) or not self._exists(symbol, base):
+            return None
+        return base, rule
+
+    def _exists(self, symbol, interval):
+        try:
+            self.path_for(symbol, interval)
+            return True
+        except FileNotFoundError:
+            return False
+
+    # Série completa, lida do disco (ou reamostrada) uma única vez
+    def load(self, symbol, interval):
+        key = (symbol, interval)
+        derived = self.derivation(symbol, interval)
+        if derived is not None:
+            with self._lock:
+                if key in self._frames:
+                    return self._frames[key]
+            df = resample_ohlcv(self.load(symbol, derived[0]), derived[1])
+            with self._lock:
+                return self._frames.setdefault(key, df)
+        with self._lock:
+            if key not in self._frames:
+                path = self.path_for(symbol, interval)
+                if path.endswith('.parquet'):
+                    df = pd.read_parquet(path)
+                else:
+                    df = pd.read_csv(path, index_col=0)
+                # Em nanossegundos para comparar com o relógio do replay
+                df.index = pd.to_datetime(df.index, utc=True).as_unit('ns')
+                self._frames[key] = df.sort_index()
+            return self._frames[key]
+
+    # Pares (ativo, intervalo) gravados no diretório
+    def available(self):
+        pairs = set()
+        for name in os.listdir(self.data_dir):
+            stem, _, extension = name.rpartition('.')
+            symbol, _, interval = stem.rpartition('_')
+            if extension in ('csv', 'parquet') and symbol and interval != 'trades':
+                pairs.add((symbol, interval))
+        return sorted(pairs)
+
+    def loaded_indexes(self):
+        with self._lock:
+            return [df.index for df in self._frames.values()]
+
+    def history(self, symbol, period, interval):
+        return slice_period(self.load(symbol, interval), period).copy()
+
+
+# Reprodução de barras gravadas com relógio acelerado em tempo dos dados:
+# no instante t são liberadas as barras com índice <= t0 + t * speed, para
+# todos os intervalos e ativos, de modo que 1h, 1d, 1wk e 1mo fiquem alinhados
+class ReplayProvider(DataProvider):
+    name = "Replay"
+
+    def __init__(self, source, speed=3600.0, warmup_bars=200):
+        self.source = source
+        # Segundos de dados reproduzidos por segundo real
+        self.speed = speed
+        self.warmup_bars = warmup_bars
+        self.started_at = time.monotonic()
+        self._origin = None
+        self._lock = threading.Lock()
+
+    # Início do replay, fixado uma vez por fonte: o primeiro instante em que
+    # todas as séries gravadas com mais de warmup_bars barras já têm o
+    # aquecimento (séries mais curtas, como 1mo, só exigem a primeira barra)
+    def origin(self):
+        with self._lock:
+            if self._origin is None:
+                starts = []
+                for symbol, interval in self.source.available():
+                    index = self.source.load(symbol, interval).index
+                    if len(index) > self.warmup_bars:
+                        starts.append(index[self.warmup_bars - 1])
+                    elif len(index):
+                        starts.append(index[0])
+                if not starts:
+                    raise FileNotFoundError(f"Sem dados locais em {self.source.data_dir}")
+                self._origin = max(starts)
+                self.started_at = time.monotonic()
+            return self._origin
+
+    # Relógio do replay, em tempo dos dados
+    def clock(self):
+        origin = self.origin()
+        return origin + pd.Timedelta(seconds=(time.monotonic() - self.started_at) * self.speed)
+
+    # Séries derivadas são reamostradas das barras base já liberadas, para
+    # que a barra em formação (semana/mês corrente) não antecipe dados
+    def released(self, symbol, interval):
+        derived = self.source.derivation(symbol, interval)
+        if derived is not None:
+            return resample_ohlcv(self.released(symbol, derived[0]), derived[1])
+        df = self.source.load(symbol, interval)
+        return df.iloc[:df.index.searchsorted(self.clock(), side='right')]
+
+    # Última barra liberada da série pedida, ou de qualquer série carregada;
+    # assim uma nova barra de 1h não invalida o cache de quem lê 1d
+    def cache_token(self, symbol=None, interval=None):
+        now = self.clock()
+        if symbol is not None and interval is not None:
+            derived = self.source.derivation(symbol, interval)
+            if derived is not None:
+                interval = derived[0]
+            index = self.source.load(symbol, interval).index
+            position = index.searchsorted(now, side='right')
+            return index[position - 1] if position else None
+        latest = [
+            index[position - 1]
+            for index in self.source.loaded_indexes()
+            for position in [index.searchsorted(now, side='right')]
+            if position
+        ]
+        return max(latest) if latest else None
+
+    def history(self, symbol, period, interval):
+        return slice_period(self.released(symbol, interval), period).copy()
+
+    # Gerar as barras (namedtuples com Index, Open, ..., Volume) posteriores a
+    # start (padrão: início do replay) à medida que o relógio as libera
+    def stream(self, symbol, interval, start=None):
+        df = self.source.load(symbol, interval)
+        last = self.origin() if start is None else pd.Timestamp(start)
+        position = df.index.searchsorted(last, side='right')
+        while position < len(df):
+            available = df.index.searchsorted(self.clock(), side='right')
+            if available <= position:
+                wait = (df.index[position] - self.clock()).total_seconds() / self.speed
+                time.sleep(min(max(wait, 0.01), 1.0))
+                continue
+            for bar in df.iloc[position:available].itertuples(name='Bar'):
+                yield bar
+            position = available
+
+
+# Barras construídas a partir de negócios gravados em
+# <diretório>/<ativo>_trades.csv, com intervalos de tempo, negócios ou volume
+class TradesProvider(DataProvider):
+    name = "Negócios locais"
+    interval_options = {
+        "1 Minuto": "1min",
+        "5 Minutos": "5min",
+        "15 Minutos": "15min",
+        "1 Hora": "1h",
+        "4 Horas": "4h",
+        "1 Dia": "1d",
+        "1000 Negócios": "1000t",
+        "Volume 100": "100v",
+    }
+
+    def __init__(self, data_dir, max_bars=10000):
+        self.data_dir = data_dir
+        self.max_bars = max_bars
+        # Um construtor de barras vivo por (ativo, intervalo), com o leitor
+        # que continua o arquivo de onde parou
+        self._builders = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, symbol):
+        path = os.path.join(self.data_dir, f"{symbol}_trades.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Sem negócios gravados para {symbol} em {self.data_dir}")
+        return path
+
+    # Agregar só os negócios acrescentados ao arquivo desde a última leitura;
+    # se o arquivo foi substituído ou reescrito, recomeçar do início
+    def load(self, symbol, interval):
+        path = self.path_for(symbol)
+        key = (symbol, interval)
+        with self._lock:
+            entry = self._builders.get(key)
+            if entry is None or not entry[1].unchanged():
+                entry = (BarBuilder(interval, max_bars=self.max_bars), TradesFileReader(path))
+                self._builders[key] = entry
+            builder, reader = entry
+            builder.consume(reader.read_new())
+            return builder.to_frame(include_open=True)
+
+    def history(self, symbol, period, interval):
+        return slice_period(self.load(symbol, interval), period).copy()
+
+    # Data de modificação do arquivo de negócios do ativo (ou de todos)
+    def cache_token(self, symbol=None, interval=None):
+        try:
+            if symbol is not None:
+                return os.path.getmtime(self.path_for(symbol))
+            return max(
+                os.path.getmtime(os.path.join(self.data_dir, name))
+                for name in os.listdir(self.data_dir)
+                if name.endswith('_trades.csv')
+            )
+        except (OSError, ValueError):
+            return None
+
+
+# Criar a fonte de dados a partir das variáveis de ambiente
+def get_provider():
+    kind = os.environ.get('BTC_DASHBOARD_PROVIDER', 'yfinance')
+    data_dir = os.environ.get('BTC_DASHBOARD_DATA_DIR', 'data')
+    if kind == 'yfinance':
+        return YFinanceProvider()
+    if kind == 'local':
+        return LocalFileProvider(data_dir)
+    if kind == 'trades':
+        return TradesProvider(data_dir)
+    if kind == 'replay':
+        return ReplayProvider(
+            LocalFileProvider(data_dir),
+            speed=float(os.environ.get('BTC_DASHBOARD_REPLAY_SPEED', 3600)),
+            warmup_bars=int(os.environ.get('BTC_DASHBOARD_REPLAY_WARMUP', 200)),
+        )
+    raise ValueError(f"Fonte de dados desconhecida: {kind!r}")
+
+
+# Gravar o histórico do Yahoo Finance para uso offline
+def record(symbols, period, intervals, data_dir, file_format='csv'):
+    os.makedirs(data_dir, exist_ok=True)
+    provider = YFinanceProvider()
+    for symbol in symbols:
+        for interval in intervals:
+            df = provider.history(symbol, period, interval)[OHLCV_COLUMNS]
+            path = os.path.join(data_dir, f"{symbol}_{interval}.{file_format}")
+            if file_format == 'parquet':
+                df.to_parquet(path)
+            else:
+                df.to_csv(path)
+            print(f"{path}: {len(df)} barras")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gravar dados do Yahoo Finance para as fontes local/replay")
+    parser.add_argument('symbols', nargs='+', help="Ativos, ex.: BTC-USD ETH-USD")
+    parser.add_argument('--interval', action='append', default=[], help="Intervalos (padrão: 1d)")
+    parser.add_argument('--period', default='max')
+    parser.add_argument('--dir', default='data')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    args = parser.parse_args()
+    record(args.symbols, args.period, args.interval or ['1d'], args.dir, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from incremental import SlidingMax, SlidingMeanStd
+from levels import rolling_max
+
+# Barras por ano para anualizar a volatilidade (cripto negocia 24/7)
+PERIODS_PER_YEAR = {
+    "1h": 24 * 365,
+    "4h": 6 * 365,
+    "1d": 365,
+    "1wk": 52,
+    "1mo": 12,
+}
+
+GK_FACTOR = 2 * math.log(2) - 1
+
+
+# Barras por ano de um intervalo; barras de negócios/volume não têm duração
+# fixa e usam a duração mediana das barras do índice (ou o padrão diário)
+def periods_per_year(interval, index=None, default=365):
+    if interval in PERIODS_PER_YEAR:
+        return PERIODS_PER_YEAR[interval]
+    # "1000t" seria lido como minutos por versões antigas do pandas
+    if not re.fullmatch(r'\d+(?:\.\d+)?[tv]', interval):
+        try:
+            return pd.Timedelta(days=365) / pd.Timedelta(interval)
+        except ValueError:
+            pass
+    if index is not None and len(index) > 1:
+        median = pd.Series(index).diff().median()
+        if median > pd.Timedelta(0):
+            return pd.Timedelta(days=365) / median
+    return default
+
+
+# Soma móvel em O(n) via soma acumulada; janelas com NaN resultam em NaN
+def rolling_sum(values, window):
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    missing = np.isnan(values)
+    total = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, values))])
+    gaps = np.concatenate([[0], np.cumsum(missing)])
+    sums = total[window:] - total[:-window]
+    sums[(gaps[window:] - gaps[:-window]) > 0] = np.nan
+    out[window - 1:] = sums
+    return out
+
+
+def rolling_mean(values, window):
+    return rolling_sum(values, window) / window
+
+
+# Desvio padrão móvel em O(n); os valores são centrados antes das somas
+# acumuladas para evitar cancelamento numérico
+def rolling_std(values, window, ddof=1):
+    values = np.asarray(values, dtype=float)
+    centered = values - np.nanmean(values) if np.isfinite(values).any() else values
+    sums = rolling_sum(centered, window)
+    sums_sq = rolling_sum(centered * centered, window)
+    variance = (sums_sq - sums * sums / window) / (window - ddof)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def zscore(values, window):
+    values = np.asarray(values, dtype=float)
+    std = rolling_std(values, window, ddof=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(std > 0, (values - rolling_mean(values, window)) / std, 0.0 * std)
+
+
+def log_returns(close):
+    close = np.asarray(close, dtype=float)
+    return np.concatenate([[np.nan], np.log(close[1:] / close[:-1])])
+
+
+def true_range(high, low, close):
+    high, low, close = (np.asarray(x, dtype=float) for x in (high, low, close))
+    prev_close = np.concatenate([[close[0]], close[:-1]])
+    return np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+
+
+# ATR com suavização de Wilder, semeado com a média das primeiras barras (como no ta)
+def average_true_range(high, low, close, window=14):
+    tr = true_range(high, low, close)
+    if len(tr) < window:
+        return np.full(len(tr), np.nan)
+    seeded = np.full(len(tr), np.nan)
+    seeded[window - 1] = tr[:window].mean()
+    seeded[window:] = tr[window:]
+    return pd.Series(seeded).ewm(alpha=1 / window, adjust=False).mean().to_numpy()
+
+
+def realized_volatility(close, window, periods_per_year=365):
+    return rolling_std(log_returns(close), window) * math.sqrt(periods_per_year)
+
+
+def parkinson_volatility(high, low, window, periods_per_year=365):
+    hl = np.log(np.asarray(high, dtype=float) / np.asarray(low, dtype=float)) ** 2
+    return np.sqrt(rolling_mean(hl, window) / (4 * math.log(2)) * periods_per_year)
+
+
+def garman_klass_volatility(open_, high, low, close, window, periods_per_year=365):
+    hl = np.log(np.asarray(high, dtype=float) / np.asarray(low, dtype=float)) ** 2
+    co = np.log(np.asarray(close, dtype=float) / np.asarray(open_, dtype=float)) ** 2
+    terms = 0.5 * hl - GK_FACTOR * co
+    return np.sqrt(np.maximum(rolling_mean(terms, window), 0.0) * periods_per_year)
+
+
+def rolling_drawdown(close, window):
+    close = np.asarray(close, dtype=float)
+    return close / rolling_max(close, window) - 1
+
+
+# Estatísticas de risco para várias janelas; colunas com sufixo da janela
+def compute_risk_stats(df, windows=(30,), periods_per_year=365, atr_window=14):
+    o, h, l, c = (df[col].to_numpy(dtype=float) for col in ('Open', 'High', 'Low', 'Close'))
+    stats = {'ATR': average_true_range(h, l, c, atr_window)}
+    for window in windows:
+        rv = realized_volatility(c, window, periods_per_year)
+        stats[f'RV_{window}'] = rv
+        stats[f'Parkinson_{window}'] = parkinson_volatility(h, l, window, periods_per_year)
+        stats[f'GK_{window}'] = garman_klass_volatility(o, h, l, c, window, periods_per_year)
+        stats[f'Drawdown_{window}'] = rolling_drawdown(c, window)
+        stats[f'Close_zscore_{window}'] = zscore(c, window)
+    return pd.DataFrame(stats, index=df.index)
+
+
+# Adicionar as estatísticas de risco de uma janela às colunas do DataFrame
+def calculate_risk_indicators(df, window=30, periods_per_year=365, zscore_window=90, atr_window=14):
+    if df is None or df.empty:
+        return df
+    stats = compute_risk_stats(df, (window,), periods_per_year, atr_window)
+    df['ATR'] = stats['ATR']
+    df['RV'] = stats[f'RV_{window}']
+    df['Parkinson'] = stats[f'Parkinson_{window}']
+    df['GK'] = stats[f'GK_{window}']
+    df['Drawdown'] = stats[f'Drawdown_{window}']
+    df['Close_zscore'] = stats[f'Close_zscore_{window}']
+    df['RV_zscore'] = zscore(df['RV'].to_numpy(), zscore_window)
+    return df
+
+
+# Versão incremental de calculate_risk_indicators: O(1) por barra adicionada
+class RiskState:
+    def __init__(self, window=30, periods_per_year=365, zscore_window=90, atr_window=14):
+        self.annualization = math.sqrt(periods_per_year)
+        self.prev_close = None
+        self.atr_window = atr_window
+        self.atr_seed = []
+        self.atr = None
+        self.returns = SlidingMeanStd(window, ddof=1)
+        self.parkinson = SlidingMeanStd(window)
+        self.gk = SlidingMeanStd(window)
+        self.peak = SlidingMax(window)
+        self.close_stats = SlidingMeanStd(window)
+        self.rv_stats = SlidingMeanStd(zscore_window)
+
+    # Aquecer o estado com as barras de um DataFrame
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        state = cls(**kwargs)
+        for o, h, l, c in df[['Open', 'High', 'Low', 'Close']].itertuples(index=False):
+            state.append(o, h, l, c)
+        return state
+
+    def append(self, open_, high, low, close):
+        prev_close = self.prev_close if self.prev_close is not None else close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        if self.atr is not None:
+            self.atr = (self.atr * (self.atr_window - 1) + tr) / self.atr_window
+        else:
+            self.atr_seed.append(tr)
+            if len(self.atr_seed) == self.atr_window:
+                self.atr = sum(self.atr_seed) / self.atr_window
+        atr = self.atr
+
+        rv = None
+        if self.prev_close is not None:
+            self.returns.update(math.log(close / self.prev_close))
+            if self.returns.ready:
+                rv = self.returns.std * self.annualization
+        self.prev_close = close
+
+        hl = math.log(high / low) ** 2
+        co = math.log(close / open_) ** 2
+        self.parkinson.update(hl)
+        self.gk.update(0.5 * hl - GK_FACTOR * co)
+        parkinson = gk = None
+        if self.parkinson.ready:
+            parkinson = math.sqrt(self.parkinson.mean / (4 * math.log(2))) * self.annualization
+            gk = math.sqrt(max(self.gk.mean, 0.0)) * self.annualization
+
+        peak = self.peak.update(close)
+        drawdown = close / peak - 1 if peak is not None else None
+
+        self.close_stats.update(close)
+        close_zscore = _zscore(close, self.close_stats)
+
+        rv_zscore = None
+        if rv is not None:
+            self.rv_stats.update(rv)
+            rv_zscore = _zscore(rv, self.rv_stats)
+
+        return {
+            'ATR': atr,
+            'RV': rv,
+            'Parkinson': parkinson,
+            'GK': gk,
+            'Drawdown': drawdown,
+            'Close_zscore': close_zscore,
+            'RV_zscore': rv_zscore,
+        }
+
+
+def _zscore(value, stats):
+    if not stats.ready:
+        return None
+    std = stats.std
+    return (value - stats.mean) / std if std > 0 else 0.0